@@ -0,0 +1,23 @@
+"""Shared loader for atc_config.json.
+
+The test-send utilities each resolved their own CFG_PATH and parsed the
+config themselves. One loader keeps the path in a single place and, via
+atc_json.load_file_cached, parses the file once per process (per mtime)
+when several scripts run under the same harness.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import atc_json
+
+BASE_DIR = Path(__file__).resolve().parent
+CONFIG_PATH = BASE_DIR / "atc_config.json"
+
+
+def load() -> dict[str, Any]:
+    """Parsed atc_config.json, memoized on mtime; treat as read-only."""
+
+    return atc_json.load_file_cached(CONFIG_PATH)
@@ -4,41 +4,106 @@ import csv
 import io
 import json
 import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Iterable
 
+import atc_json
+
 
 DB_FILENAME = "atc.db"
 
+# Keep in sync with the delivery_state CREATE TABLE column order.
+DELIVERY_STATE_COLUMNS: tuple[str, ...] = (
+    "delivery_number",
+    "checked",
+    "primary_cause",
+    "escalation",
+    "note",
+    "qa_status",
+    "qa_note",
+    "audit_completed",
+    "audit_completed_at_epoch",
+    "audit_completed_by",
+    "cleared_from_active",
+    "cleared_reason",
+    "cleared_at_epoch",
+    "cleared_by",
+    "updated_at_epoch",
+    "updated_by",
+)
+
 
 @dataclass(frozen=True)
 class DbPaths:
     base_dir: Path
 
-    @property
-    def db_path(self) -> Path:
-        return self.base_dir / DB_FILENAME
+    # Computed once; hot paths (e.g. _connect key lookup) just load attributes.
+    db_path: Path = field(init=False)
+    legacy_triage_json: Path = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "db_path", self.base_dir / DB_FILENAME)
+        object.__setattr__(
+            self, "legacy_triage_json", self.base_dir / "atc_delivery_triage.json"
+        )
 
-    @property
-    def legacy_triage_json(self) -> Path:
-        return self.base_dir / "atc_delivery_triage.json"
+
+# Per-thread connection cache. Opening SQLite (plus WAL/PRAGMA setup) on every
+# call dominates the cost of tiny reads/writes, so we pay it once per thread.
+_local = threading.local()
+
+# Schema bootstrap is a process-lifetime concern, not a per-call one.
+_initialized_lock = threading.Lock()
+_initialized: set[str] = set()
 
 
 def _connect(db_path: Path) -> sqlite3.Connection:
+    cache: dict[str, sqlite3.Connection] = getattr(_local, "connections", None) or {}
+    if not hasattr(_local, "connections"):
+        _local.connections = cache
+
+    key = str(db_path)
+    con = cache.get(key)
+    if con is not None:
+        return con
+
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(str(db_path))
+    con = sqlite3.connect(key)
     con.row_factory = sqlite3.Row
     con.execute("PRAGMA journal_mode=WAL;")
+    # WAL + synchronous=NORMAL: fsync per checkpoint instead of per commit;
+    # durability is still fine for triage state (worst case: last write lost).
+    con.execute("PRAGMA synchronous=NORMAL;")
     con.execute("PRAGMA foreign_keys=ON;")
+    con.execute("PRAGMA busy_timeout=5000;")
+    con.execute("PRAGMA temp_store=MEMORY;")
+    con.execute("PRAGMA mmap_size=268435456;")
+    con.execute("PRAGMA cache_size=-20000;")
+    con.execute("PRAGMA wal_autocheckpoint=1000;")
+    cache[key] = con
     return con
 
 
 def init_db(base_dir: Path) -> None:
+    """Create tables/indexes once per process.
+
+    Call this (or `migrate_from_legacy_triage_json_if_needed`) at app startup;
+    the read/write helpers assume the schema already exists.
+    """
+
     paths = DbPaths(base_dir=base_dir)
-    with _connect(paths.db_path) as con:
-        con.executescript(
+    key = str(paths.db_path)
+    with _initialized_lock:
+        if key in _initialized:
+            return
+        _initialized.add(key)
+
+    con = _connect(paths.db_path)
+    con.executescript(
             """
             CREATE TABLE IF NOT EXISTS delivery_state (
               delivery_number TEXT PRIMARY KEY,
@@ -80,10 +145,19 @@ def init_db(base_dir: Path) -> None:
               created_by TEXT NOT NULL
             );
 
-            CREATE INDEX IF NOT EXISTS idx_delivery_events_delivery
-              ON delivery_events(delivery_number);
+            -- Old single-column index superseded by the composite ones below.
+            DROP INDEX IF EXISTS idx_delivery_events_delivery;
+
+            -- "events for delivery D newer than T" without touching the table
+            CREATE INDEX IF NOT EXISTS idx_delivery_events_dn_time
+              ON delivery_events(delivery_number, created_at_epoch DESC);
+
+            -- Covering index for the common per-delivery history read
+            -- (payload/event_type served straight from the index b-tree).
+            CREATE INDEX IF NOT EXISTS idx_delivery_events_dn_time_covering
+              ON delivery_events(delivery_number, created_at_epoch DESC, event_type, payload_json);
             """
-        )
+    )
 
 
 def _coerce_bool(value: Any) -> int:
@@ -116,60 +190,90 @@ def migrate_from_legacy_triage_json_if_needed(base_dir: Path) -> None:
     if not paths.legacy_triage_json.exists():
         return
 
-    with _connect(paths.db_path) as con:
-        row = con.execute("SELECT COUNT(*) AS c FROM delivery_state").fetchone()
-        if row and int(row["c"] or 0) > 0:
-            return
+    con = _connect(paths.db_path)
+    row = con.execute("SELECT COUNT(*) AS c FROM delivery_state").fetchone()
+    if row and int(row["c"] or 0) > 0:
+        return
 
-        try:
-            payload = json.loads(paths.legacy_triage_json.read_text(encoding="utf-8"))
-        except Exception:
-            return
+    try:
+        payload = json.loads(paths.legacy_triage_json.read_text(encoding="utf-8"))
+    except Exception:
+        return
 
-        deliveries = payload.get("deliveries", {}) if isinstance(payload, dict) else {}
-        if not isinstance(deliveries, dict):
-            return
+    deliveries = payload.get("deliveries", {}) if isinstance(payload, dict) else {}
+    if not isinstance(deliveries, dict):
+        return
 
-        now = int(time.time())
-        for delivery_number, triage in deliveries.items():
-            if not isinstance(triage, dict):
-                continue
-            dn = _coerce_str(delivery_number)
-            if not dn:
-                continue
-
-            updates = {
-                "checked": _coerce_bool(triage.get("checked", False)),
-                "primary_cause": _coerce_str(triage.get("primary_cause", "")),
-                "escalation": _coerce_str(triage.get("escalation", "")),
-                "note": _coerce_str(triage.get("note", "")),
-                "qa_status": _coerce_str(triage.get("qa_status", "")),
-                "qa_note": _coerce_str(triage.get("qa_note", "")),
-                "updated_at_epoch": _coerce_int(triage.get("updated_at_epoch") or now),
-                "updated_by": _coerce_str(triage.get("updated_by", "")),
-            }
-
-            _upsert_state(con, dn, updates)
+    now = int(time.time())
+    rows: list[tuple[Any, ...]] = []
+    for delivery_number, triage in deliveries.items():
+        if not isinstance(triage, dict):
+            continue
+        dn = _coerce_str(delivery_number)
+        if not dn:
+            continue
 
+        rows.append(
+            (
+                dn,
+                _coerce_bool(triage.get("checked", False)),
+                _coerce_str(triage.get("primary_cause", "")),
+                _coerce_str(triage.get("escalation", "")),
+                _coerce_str(triage.get("note", "")),
+                _coerce_str(triage.get("qa_status", "")),
+                _coerce_str(triage.get("qa_note", "")),
+                _coerce_int(triage.get("updated_at_epoch") or now),
+                _coerce_str(triage.get("updated_by", "")),
+            )
+        )
+
+    if not rows:
+        return
+
+    # One prepared statement + one transaction for the whole import.
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        con.executemany(
+            """
+            INSERT INTO delivery_state(
+              delivery_number, checked, primary_cause, escalation, note,
+              qa_status, qa_note, updated_at_epoch, updated_by
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(delivery_number) DO UPDATE SET
+              checked=excluded.checked,
+              primary_cause=excluded.primary_cause,
+              escalation=excluded.escalation,
+              note=excluded.note,
+              qa_status=excluded.qa_status,
+              qa_note=excluded.qa_note,
+              updated_at_epoch=excluded.updated_at_epoch,
+              updated_by=excluded.updated_by
+            """,
+            rows,
+        )
         con.commit()
+    except Exception:
+        # Roll back even on a failed commit: the connection is cached for
+        # the thread's lifetime and must not be left inside a transaction.
+        con.rollback()
+        raise
 
 
 def get_delivery_state(base_dir: Path, delivery_number: str) -> dict[str, Any] | None:
-    init_db(base_dir)
     paths = DbPaths(base_dir=base_dir)
 
     dn = _coerce_str(delivery_number)
     if not dn:
         return None
 
-    with _connect(paths.db_path) as con:
-        row = con.execute(
-            "SELECT * FROM delivery_state WHERE delivery_number = ?",
-            (dn,),
-        ).fetchone()
-        if not row:
-            return None
-        return dict(row)
+    con = _connect(paths.db_path)
+    row = con.execute(
+        "SELECT * FROM delivery_state WHERE delivery_number = ?",
+        (dn,),
+    ).fetchone()
+    if not row:
+        return None
+    return dict(row)
 
 
 def upsert_delivery_state(
@@ -181,7 +285,6 @@ def upsert_delivery_state(
 ) -> dict[str, Any]:
     """Upsert delivery state and append an event row."""
 
-    init_db(base_dir)
     paths = DbPaths(base_dir=base_dir)
 
     dn = _coerce_str(delivery_number)
@@ -233,8 +336,12 @@ def upsert_delivery_state(
     # always touch updated_at
     clean.setdefault("updated_at_epoch", now)
 
-    with _connect(paths.db_path) as con:
-        _upsert_state(con, dn, clean)
+    # One IMMEDIATE transaction = one WAL fsync for the state upsert + event
+    # append, and RETURNING gives us the post-upsert row without a re-SELECT.
+    con = _connect(paths.db_path)
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        row = _upsert_state(con, dn, clean)
         con.execute(
             """
             INSERT INTO delivery_events(delivery_number, event_type, payload_json, created_at_epoch, created_by)
@@ -243,52 +350,70 @@ def upsert_delivery_state(
             (
                 dn,
                 _coerce_str(event_type) or "update",
-                json.dumps(clean, sort_keys=True),
+                atc_json.dumps_str(clean, sort_keys=True),
                 now,
                 _coerce_str(clean.get("updated_by", "")),
             ),
         )
         con.commit()
+    except Exception:
+        # Roll back even on a failed commit: the connection is cached for
+        # the thread's lifetime and must not be left inside a transaction.
+        con.rollback()
+        raise
+
+    return dict(row) if row else {"delivery_number": dn, **clean}
+
+
+@lru_cache(maxsize=256)
+def _upsert_sql(update_keys: tuple[str, ...]) -> str:
+    # The allowed-key schema is small and fixed, so the realistic set of key
+    # combinations is bounded; caching skips the per-call string building and
+    # lets sqlite3's statement cache reuse the prepared plan.
+    cols = ("delivery_number",) + update_keys
+    placeholders = ", ".join(["?"] * len(cols))
+    update_set = ", ".join([f"{c}=excluded.{c}" for c in update_keys])
+
+    return (
+        f"INSERT INTO delivery_state({', '.join(cols)}) VALUES ({placeholders}) "
+        f"ON CONFLICT(delivery_number) DO UPDATE SET {update_set} "
+        f"RETURNING *"
+    )
 
-        row = con.execute(
-            "SELECT * FROM delivery_state WHERE delivery_number = ?",
-            (dn,),
-        ).fetchone()
-        return dict(row) if row else {"delivery_number": dn, **clean}
-
-
-def _upsert_state(con: sqlite3.Connection, delivery_number: str, updates: dict[str, Any]) -> None:
-    cols = ["delivery_number"] + sorted(updates.keys())
-    placeholders = ["?"] * len(cols)
-    update_set = ", ".join([f"{c}=excluded.{c}" for c in cols if c != "delivery_number"])
 
-    values = [delivery_number] + [updates[c] for c in cols if c != "delivery_number"]
-
-    sql = (
-        f"INSERT INTO delivery_state({', '.join(cols)}) VALUES ({', '.join(placeholders)}) "
-        f"ON CONFLICT(delivery_number) DO UPDATE SET {update_set}"
-    )
-    con.execute(sql, values)
+def _upsert_state(
+    con: sqlite3.Connection, delivery_number: str, updates: dict[str, Any]
+) -> sqlite3.Row | None:
+    keys = tuple(sorted(updates.keys()))
+    values = [delivery_number] + [updates[k] for k in keys]
+    return con.execute(_upsert_sql(keys), values).fetchone()
 
 
 def export_delivery_state_rows(base_dir: Path) -> Iterable[dict[str, Any]]:
-    init_db(base_dir)
     paths = DbPaths(base_dir=base_dir)
-    with _connect(paths.db_path) as con:
-        rows = con.execute("SELECT * FROM delivery_state").fetchall()
-        for r in rows:
-            yield dict(r)
+    con = _connect(paths.db_path)
+    # Stream from the cursor; no fetchall() materialization. Callers rely on
+    # dict(.get/jsonify) semantics, so each row is still converted lazily.
+    for r in con.execute("SELECT * FROM delivery_state"):
+        yield dict(r)
 
 
 def export_delivery_state_csv(base_dir: Path) -> str:
-    rows = list(export_delivery_state_rows(base_dir))
-    if not rows:
+    paths = DbPaths(base_dir=base_dir)
+    con = _connect(paths.db_path)
+
+    # Columns are schema-known, so stream tuple rows straight from the cursor
+    # instead of materializing dicts and re-deriving fieldnames per export.
+    cur = con.execute(
+        f"SELECT {', '.join(DELIVERY_STATE_COLUMNS)} FROM delivery_state"
+    )
+    first = cur.fetchone()
+    if first is None:
         return ""
 
-    fieldnames = sorted({k for r in rows for k in r.keys()})
     buf = io.StringIO()
-    writer = csv.DictWriter(buf, fieldnames=fieldnames)
-    writer.writeheader()
-    for r in rows:
-        writer.writerow(r)
+    writer = csv.writer(buf)
+    writer.writerow(DELIVERY_STATE_COLUMNS)
+    writer.writerow(tuple(first))
+    writer.writerows(cur)
     return buf.getvalue()
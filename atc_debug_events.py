@@ -0,0 +1,144 @@
+"""Shared event-log access for the debug scripts.
+
+The events log can grow to many MB; slurping it with json.loads keeps the
+raw text, the parsed tree, and intermediate strings resident at once.
+`iter_events` streams one event dict at a time via ijson when available
+(pinned in requirements_atc.txt) and falls back to a plain full parse so the
+debug tools still run in a bare environment.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+import atc_json
+
+# Row shape for load_event_rows: (delivery_number, shift_label,
+# detected_at epoch seconds, rec_dt epoch seconds); 0.0 means unparseable.
+EventRow = tuple[str, str, float, float]
+
+# ijson is resolved on the first iter_events call so that importing this
+# module (e.g. for parse_dt alone) stays free. False means "tried, absent".
+_ijson: Any = None
+
+
+# 1-slot memo: events from the same tick repeat detected_at strings, so the
+# previous parse answers most lookups without touching fromisoformat again.
+_last_parsed: tuple[str, datetime | None] = ("", None)
+
+
+def parse_dt(s: str) -> datetime | None:
+    """Parse detected_at/rec_dt strings: ISO-8601-ish, space or T separator,
+    optional fractional seconds. Python 3.11's C fromisoformat handles all of
+    these directly, so no fallback chain is needed."""
+
+    global _last_parsed
+
+    s = (s or "").strip()
+    if not s:
+        return None
+    if _last_parsed[0] == s:
+        return _last_parsed[1]
+
+    try:
+        dt: datetime | None = datetime.fromisoformat(s)
+    except ValueError:
+        dt = None
+    _last_parsed = (s, dt)
+    return dt
+
+
+def iter_events(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield event dicts from an atc_events_log.json-shaped file."""
+
+    if not path.exists():
+        return
+
+    global _ijson
+    if _ijson is None:
+        try:
+            import ijson as _ijson_mod
+
+            _ijson = _ijson_mod
+        except ImportError:
+            _ijson = False
+
+    # The log is machine-written, so events are plain dicts; type() is an
+    # exact pointer compare, cheaper than isinstance's subclass walk, and a
+    # streamed source can't be validated once up front.
+    if _ijson:
+        with path.open("rb") as f:
+            yield from (e for e in _ijson.items(f, "events.item") if type(e) is dict)
+        return
+
+    # Fallback full parse: mmap the file so the parser reads straight from
+    # the page cache instead of copying the whole log into a bytes object
+    # first (read_bytes doubles peak memory on a large log).
+    try:
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mv = memoryview(mm)
+            try:
+                payload = atc_json.loads(mv)
+            finally:
+                mv.release()
+    except (OSError, ValueError):
+        return
+
+    events = payload.get("events", []) if isinstance(payload, dict) else []
+    if not isinstance(events, list):
+        return
+    yield from (e for e in events if type(e) is dict)
+
+
+def load_event_rows(path: Path) -> list[EventRow]:
+    """Return pre-parsed rows for the events log, cached in a pickle side-car.
+
+    Operators run the debug scripts back-to-back; the JSON + datetime parse
+    is identical each time, so the parsed rows are memoized next to the log
+    keyed on its mtime. Unpickling tuples of floats is an order of magnitude
+    faster than reparsing. The cache is best-effort: any read/write failure
+    just means a full reparse.
+    """
+
+    try:
+        log_mtime = path.stat().st_mtime_ns
+    except OSError:
+        return []
+
+    cache_path = path.with_name("atc_events_cache.pkl")
+    try:
+        with cache_path.open("rb") as f:
+            cached_mtime, rows = pickle.load(f)
+        if cached_mtime == log_mtime:
+            return rows
+    except Exception:
+        pass
+
+    rows = []
+    for e in iter_events(path):
+        det = parse_dt(str(e.get("detected_at", "") or ""))
+        rec = parse_dt(str(e.get("rec_dt", "") or ""))
+        rows.append(
+            (
+                str(e.get("delivery_number", "") or "").strip(),
+                str(e.get("shift_label", "") or "").strip(),
+                det.timestamp() if det is not None else 0.0,
+                rec.timestamp() if rec is not None else 0.0,
+            )
+        )
+
+    # Atomic-ish write so a crash can't leave a torn cache behind.
+    try:
+        tmp = cache_path.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump((log_mtime, rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+
+    return rows
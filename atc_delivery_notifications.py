@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-import json
+import heapq
+import re
 import time
 from collections import defaultdict
-from dataclasses import asdict
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+import atc_json
 from atc_email_state_store import (
     EmailState,
     can_send,
@@ -41,6 +43,35 @@ def _log_notification_error(*, base_dir: Path, msg: str) -> None:
         pass
 
 
+# Characters we refuse to put in outbox filenames.
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+# mtime-keyed cache for files we re-read every polling tick. The JSON decode
+# dominates a quiet tick, and the files only change when we write them.
+_file_cache: dict[Path, tuple[int, Any]] = {}
+
+
+def _cached_load(path: Path, loader: Any) -> Any:
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = -1
+    hit = _file_cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    value = loader(path)
+    _file_cache[path] = (mtime, value)
+    return value
+
+
+def _refresh_cache_entry(path: Path, value: Any) -> None:
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return
+    _file_cache[path] = (mtime, value)
+
+
 def _safe_float(x: Any) -> float:
     try:
         return float(x)
@@ -53,13 +84,12 @@ def _safe_str(x: Any) -> str:
 
 
 def _group_delivery_events(events: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
-    out: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    out: dict[str, list[dict[str, Any]]] = {}
     for e in events:
         d = _safe_str(e.get("delivery_number"))
-        if not d:
-            continue
-        out[d].append(e)
-    return dict(out)
+        if d:
+            out.setdefault(d, []).append(e)
+    return out
 
 
 def _build_delivery_summary(
@@ -71,36 +101,48 @@ def _build_delivery_summary(
     # Choose shift based on the first event.
     shift = _safe_str(events[0].get("shift_label")) or "Off Shift"
 
-    # First detected: pick min rec_dt string (best-effort).
-    rec_dts = sorted([_safe_str(e.get("rec_dt")) for e in events if _safe_str(e.get("rec_dt"))])
-    first_detected = rec_dts[0] if rec_dts else time.strftime("%Y-%m-%d %H:%M:%S")
+    # Single pass: min rec_dt, location counts, and item aggregation together.
+    # Local aliases keep the coercion helpers as LOAD_FAST inside the loop.
+    _ss = _safe_str
+    _sf = _safe_float
 
+    first_detected = ""
     loc_counts: dict[str, int] = defaultdict(int)
+    by_item: dict[str, dict[str, Any]] = {}
+
     for e in events:
-        loc = _safe_str(e.get("location_id"))
+        rec_dt = _ss(e.get("rec_dt"))
+        if rec_dt and (not first_detected or rec_dt < first_detected):
+            first_detected = rec_dt
+
+        loc = _ss(e.get("location_id"))
         if loc:
             loc_counts[loc] += 1
-    locations_sorted = [k for k, _ in sorted(loc_counts.items(), key=lambda kv: kv[1], reverse=True)]
 
-    # Items aggregation
-    by_item: dict[str, dict[str, Any]] = {}
-    for e in events:
-        item = _safe_str(e.get("item_nbr"))
+        item = _ss(e.get("item_nbr"))
         if not item:
             continue
 
-        if item not in by_item:
-            by_item[item] = {
-                "item_desc": _safe_str(e.get("item_desc")),
-                "vendor_name": _safe_str(e.get("vendor_name")),
+        meta = by_item.get(item)
+        if meta is None:
+            meta = by_item[item] = {
+                "item_desc": _ss(e.get("item_desc")),
+                "vendor_name": _ss(e.get("vendor_name")),
                 "cases": 0.0,
                 "locs": set(),
             }
 
-        by_item[item]["cases"] += _safe_float(e.get("case_qty"))
-        loc = _safe_str(e.get("location_id"))
+        meta["cases"] += _sf(e.get("case_qty"))
         if loc:
-            by_item[item]["locs"].add(loc)
+            meta["locs"].add(loc)
+
+    if not first_detected:
+        first_detected = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    # Only the top 10 ever get shown; a bounded heap beats a full sort.
+    locations_top = [
+        k for k, _ in heapq.nlargest(10, loc_counts.items(), key=itemgetter(1))
+    ]
 
     item_lines: list[DeliveryItemLine] = []
     for item_nbr, meta in by_item.items():
@@ -123,7 +165,7 @@ def _build_delivery_summary(
         shift_label=shift,
         delivery_number=delivery_number,
         first_detected_local=first_detected,
-        locations=locations_sorted[:10],
+        locations=locations_top,
         total_cases=total_cases,
         items=item_lines,
     )
@@ -157,19 +199,19 @@ def notify_new_deliveries(
 
     facility_id = str(config.get("monitoring", {}).get("facility_id", ""))
 
-    roster = load_roster(base_dir / "atc_roster.json")
+    deliveries = _group_delivery_events(new_events)
+    if not deliveries:
+        return
+
+    roster = _cached_load(base_dir / "atc_roster.json", load_roster)
 
     state_path = base_dir / "atc_email_state.json"
-    state: EmailState = load_email_state(state_path)
+    state: EmailState = _cached_load(state_path, load_email_state)
     prune_email_state(state)
 
     max_email_per_hour = int(email_cfg.get("max_emails_per_hour", 20))
     max_teams_per_hour = int(teams_cfg.get("max_messages_per_hour", 30))
 
-    deliveries = _group_delivery_events(new_events)
-    if not deliveries:
-        return
-
     out_dir = base_dir / "outbox_emails"
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -266,24 +308,25 @@ def notify_new_deliveries(
         # Outbox audit (HTML + metadata). Write only if this shift is configured for a notification.
         if will_preview_teams or will_preview_email:
             stamp = time.strftime("%Y%m%d_%H%M%S")
-            safe_delivery = "".join(ch for ch in delivery_number if ch.isalnum() or ch in ("-", "_"))
+            safe_delivery = _UNSAFE_FILENAME_CHARS.sub("", delivery_number)
             out_path = out_dir / f"delivery_{safe_delivery}_{stamp}.html"
             out_path.write_text(html, encoding="utf-8")
 
             meta_path = out_dir / f"delivery_{safe_delivery}_{stamp}.json"
-            meta_path.write_text(
-                json.dumps(
+            meta_path.write_bytes(
+                atc_json.dumps_bytes(
                     {
                         "delivery_number": delivery_number,
                         "shift_label": summary.shift_label,
                         "recipients": recipients,
                         "subject": subject,
-                        "summary": asdict(summary),
+                        # atc_json serializes the dataclass directly; no
+                        # asdict() deep-copy pass first.
+                        "summary": summary,
                         "teams_webhook_configured": bool(webhook),
                     },
-                    indent=2,
-                ),
-                encoding="utf-8",
+                    indent=True,
+                )
             )
 
         if will_send_email:
@@ -293,4 +336,6 @@ def notify_new_deliveries(
         if will_send_teams or will_send_email or will_preview_teams or will_preview_email:
             mark_delivery_emailed(state, delivery_number, shift_label=summary.shift_label)
 
-    save_email_state(state_path, state)
\ No newline at end of file
+    save_email_state(state_path, state)
+    # Our own write is the common next reader; keep the cache warm for it.
+    _refresh_cache_entry(state_path, state)
\ No newline at end of file
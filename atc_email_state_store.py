@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import json
+import os
 import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import atc_json
+
 
 @dataclass
 class EmailState:
@@ -21,11 +25,65 @@ class EmailState:
     # delivery_number -> last seen epoch seconds (for pruning threshold state)
     delivery_case_last_seen: dict[str, int]
 
-    # Legacy: timestamps of sent emails (epoch seconds) for rate limiting
+    # Legacy: timestamps of sent emails (epoch seconds) for rate limiting.
+    # Kept for old readers; refreshed from the email bucket on save.
     sent_email_timestamps: list[int]
 
-    # New: rate-limiting buckets per channel (email/teams/etc)
-    sent_timestamps_by_channel: dict[str, list[int]]
+    # New: rate-limiting buckets per channel (email/teams/etc).
+    # Deques so hourly pruning is an O(1)-per-expired-entry head trim.
+    sent_timestamps_by_channel: dict[str, deque[int]]
+
+
+def _coerce_int_map(raw: dict[Any, Any]) -> dict[str, int]:
+    # Fast path: state we wrote ourselves is well-formed, so the comprehension
+    # runs at C speed with a single try around it. Only fall back to the
+    # per-entry tolerant loop when something actually raises.
+    try:
+        return {str(k): int(v) for k, v in raw.items()}
+    except (TypeError, ValueError):
+        out: dict[str, int] = {}
+        for k, v in raw.items():
+            try:
+                out[str(k)] = int(v)
+            except Exception:
+                continue
+        return out
+
+
+def _coerce_float_map(raw: dict[Any, Any]) -> dict[str, float]:
+    try:
+        return {str(k): float(v) for k, v in raw.items()}
+    except (TypeError, ValueError):
+        out: dict[str, float] = {}
+        for k, v in raw.items():
+            try:
+                out[str(k)] = float(v)
+            except Exception:
+                continue
+        return out
+
+
+def _coerce_int_list(raw: list[Any]) -> list[int]:
+    try:
+        return [int(x) for x in raw]
+    except (TypeError, ValueError):
+        out: list[int] = []
+        for x in raw:
+            try:
+                out.append(int(x))
+            except Exception:
+                continue
+        return out
+
+
+# State keys beyond the original legacy pair (emailed_deliveries,
+# sent_email_timestamps).
+_EXTRA_STATE_KEYS = (
+    "notified_shift_by_delivery",
+    "delivery_case_totals",
+    "delivery_case_last_seen",
+    "sent_timestamps_by_channel",
+)
 
 
 def load_email_state(path: Path) -> EmailState:
@@ -40,7 +98,7 @@ def load_email_state(path: Path) -> EmailState:
         )
 
     try:
-        payload: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+        payload: dict[str, Any] = atc_json.loads(path.read_bytes())
     except json.JSONDecodeError:
         return EmailState(
             emailed_deliveries={},
@@ -52,74 +110,53 @@ def load_email_state(path: Path) -> EmailState:
         )
 
     ed = payload.get("emailed_deliveries", {})
-    ns = payload.get("notified_shift_by_delivery", {})
-    ct = payload.get("delivery_case_totals", {})
-    ls = payload.get("delivery_case_last_seen", {})
     st = payload.get("sent_email_timestamps", [])
 
     if not isinstance(ed, dict):
         ed = {}
+    if not isinstance(st, list):
+        st = []
+
+    ed2 = _coerce_int_map(ed)
+    st2 = _coerce_int_list(st)
+
+    # Fast path for legacy files: only the two original keys present, so skip
+    # the coercion stanzas for fields that cannot exist.
+    if not any(k in payload for k in _EXTRA_STATE_KEYS):
+        return EmailState(
+            emailed_deliveries=ed2,
+            notified_shift_by_delivery={},
+            delivery_case_totals={},
+            delivery_case_last_seen={},
+            sent_email_timestamps=st2,
+            sent_timestamps_by_channel={"email": deque(st2)},
+        )
+
+    ns = payload.get("notified_shift_by_delivery", {})
+    ct = payload.get("delivery_case_totals", {})
+    ls = payload.get("delivery_case_last_seen", {})
+
     if not isinstance(ns, dict):
         ns = {}
     if not isinstance(ct, dict):
         ct = {}
     if not isinstance(ls, dict):
         ls = {}
-    if not isinstance(st, list):
-        st = []
 
-    ed2: dict[str, int] = {}
-    for k, v in ed.items():
-        try:
-            ed2[str(k)] = int(v)
-        except Exception:
-            continue
-
-    ns2: dict[str, str] = {}
-    for k, v in ns.items():
-        s = str(v or "").strip()
-        if s:
-            ns2[str(k)] = s
-
-    ct2: dict[str, float] = {}
-    for k, v in ct.items():
-        try:
-            ct2[str(k)] = float(v)
-        except Exception:
-            continue
-
-    ls2: dict[str, int] = {}
-    for k, v in ls.items():
-        try:
-            ls2[str(k)] = int(v)
-        except Exception:
-            continue
-
-    st2: list[int] = []
-    for x in st:
-        try:
-            st2.append(int(x))
-        except Exception:
-            continue
+    ns2 = {str(k): s for k, v in ns.items() if (s := str(v or "").strip())}
+    ct2 = _coerce_float_map(ct)
+    ls2 = _coerce_int_map(ls)
 
     by = payload.get("sent_timestamps_by_channel", {})
     if not isinstance(by, dict):
         by = {}
 
-    by2: dict[str, list[int]] = {}
-    for k, v in by.items():
-        if not isinstance(v, list):
-            continue
-        cleaned: list[int] = []
-        for x in v:
-            try:
-                cleaned.append(int(x))
-            except Exception:
-                continue
-        by2[str(k)] = cleaned
+    by2 = {
+        str(k): deque(_coerce_int_list(v)) for k, v in by.items() if isinstance(v, list)
+    }
 
     # Back-compat: seed email channel from legacy list
-    by2.setdefault("email", list(st2))
+    by2.setdefault("email", deque(st2))
 
     return EmailState(
         emailed_deliveries=ed2,
@@ -137,20 +174,37 @@ def save_email_state(path: Path, state: EmailState) -> None:
         "notified_shift_by_delivery": state.notified_shift_by_delivery,
         "delivery_case_totals": state.delivery_case_totals,
         "delivery_case_last_seen": state.delivery_case_last_seen,
-        "sent_email_timestamps": state.sent_email_timestamps,
-        "sent_timestamps_by_channel": state.sent_timestamps_by_channel,
+        "sent_email_timestamps": list(state.sent_timestamps_by_channel.get("email", ())),
+        "sent_timestamps_by_channel": {
+            k: list(v) for k, v in state.sent_timestamps_by_channel.items()
+        },
     }
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
+    # Atomic write: a torn write here would reset all dedupe state on the next
+    # load and trigger a re-notification storm, so tmp + fsync + replace.
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(atc_json.dumps_bytes(payload, indent=True))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
-def _prune_timestamps(ts: list[int]) -> list[int]:
-    now = int(time.time())
-    hour_ago = now - 3600
-    return [t for t in ts if t >= hour_ago]
+
+def _prune_timestamps(ts: deque[int]) -> None:
+    hour_ago = int(time.time()) - 3600
+    while ts and ts[0] < hour_ago:
+        ts.popleft()
 
 
 def prune_email_state(state: EmailState, retention_days: int = 14) -> None:
     now = int(time.time())
+
+    # can_send prunes on every check (one per delivery per tick); re-walking
+    # all the retention dicts within the same second is pure waste.
+    if getattr(state, "_last_prune_epoch", None) == now:
+        return
+    state._last_prune_epoch = now  # type: ignore[attr-defined]
+
     cutoff = now - retention_days * 86400
 
     # Keep only recently-notified deliveries.
@@ -173,9 +227,8 @@ def prune_email_state(state: EmailState, retention_days: int = 14) -> None:
         if (k in state.delivery_case_last_seen) or (k in state.emailed_deliveries)
     }
 
-    state.sent_email_timestamps = _prune_timestamps(state.sent_email_timestamps)
-    for k, ts in list(state.sent_timestamps_by_channel.items()):
-        state.sent_timestamps_by_channel[k] = _prune_timestamps(list(ts))
+    for ts in state.sent_timestamps_by_channel.values():
+        _prune_timestamps(ts)
 
 
 def can_send(state: EmailState, *, channel: str, max_per_hour: int) -> bool:
@@ -185,13 +238,9 @@ def can_send(state: EmailState, *, channel: str, max_per_hour: int) -> bool:
 
 
 def mark_sent(state: EmailState, *, channel: str) -> None:
-    ts = state.sent_timestamps_by_channel.setdefault(channel, [])
+    ts = state.sent_timestamps_by_channel.setdefault(channel, deque())
     ts.append(int(time.time()))
 
-    # Back-compat: keep legacy list in sync for email
-    if channel == "email":
-        state.sent_email_timestamps = list(ts)
-
 
 def can_send_email(state: EmailState, max_per_hour: int) -> bool:
     return can_send(state, channel="email", max_per_hour=max_per_hour)
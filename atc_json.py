@@ -0,0 +1,85 @@
+"""JSON helpers for ATC hot paths.
+
+Prefers orjson (C-backed, in requirements_atc.txt) and falls back to stdlib
+json so a partial install never takes the dashboard down.
+
+orjson.JSONDecodeError subclasses json.JSONDecodeError, so call sites can
+keep catching json.JSONDecodeError either way.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        # orjson takes any buffer-protocol object (bytes, memoryview, mmap).
+        return orjson.loads(data)
+    if not isinstance(data, (str, bytes, bytearray)):
+        data = bytes(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=8)
+def _load_file_cached(path_str: str, mtime_ns: int) -> Any:
+    # os-level read: for the small files this serves, the pathlib open
+    # wrapper chain costs more than the read itself.
+    fd = os.open(path_str, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return loads(chunks[0] if len(chunks) == 1 else b"".join(chunks))
+
+
+def load_file_cached(path: Path | str) -> Any:
+    """Parse a JSON file, memoized on (path, mtime).
+
+    Repeat reads of an unchanged file cost one stat instead of a read plus
+    parse — handy for config/token-cache files touched several times per
+    run. The parsed object is shared between callers, so treat it as
+    read-only.
+    """
+
+    path_str = os.fspath(path)
+    return _load_file_cached(path_str, os.stat(path_str).st_mtime_ns)
+
+
+def _stdlib_default(obj: Any) -> Any:
+    # orjson serializes dataclasses natively; give stdlib json the same reach.
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    return json.dumps(
+        obj, indent=2 if indent else None, sort_keys=sort_keys, default=_stdlib_default
+    ).encode("utf-8")
+
+
+def dumps_str(obj: Any, *, indent: bool = False, sort_keys: bool = False) -> str:
+    return dumps_bytes(obj, indent=indent, sort_keys=sort_keys).decode("utf-8")
@@ -1,59 +1,44 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 
 @dataclass(frozen=True)
 class AtcPaths:
-    """Centralized paths for ATC runtime files (SRP)."""
+    """Centralized paths for ATC runtime files (SRP).
 
-    base_dir: Path
-
-    @property
-    def config(self) -> Path:
-        return self.base_dir / "atc_config.json"
-
-    @property
-    def state(self) -> Path:
-        return self.base_dir / "atc_state.json"
-
-    @property
-    def email_state(self) -> Path:
-        return self.base_dir / "atc_email_state.json"
-
-    @property
-    def events_log(self) -> Path:
-        return self.base_dir / "atc_events_log.json"
-
-    @property
-    def status(self) -> Path:
-        return self.base_dir / "atc_status.json"
+    Paths are computed once at construction; each access is then a plain
+    attribute load instead of a Path join.
+    """
 
-    @property
-    def dashboard_html(self) -> Path:
-        return self.base_dir / "atc_dashboard.html"
-
-    @property
-    def dashboard_template(self) -> Path:
-        return self.base_dir / "dashboard_template.html"
-
-    @property
-    def analytics_html(self) -> Path:
-        return self.base_dir / "atc_analytics.html"
-
-    @property
-    def analytics_template(self) -> Path:
-        return self.base_dir / "analytics_template.html"
-
-    @property
-    def viz_html(self) -> Path:
-        return self.base_dir / "atc_viz.html"
-
-    @property
-    def viz_template(self) -> Path:
-        return self.base_dir / "viz_template.html"
+    base_dir: Path
 
-    @property
-    def last_query(self) -> Path:
-        return self.base_dir / "last_atc_query.sql"
+    config: Path = field(init=False)
+    state: Path = field(init=False)
+    email_state: Path = field(init=False)
+    events_log: Path = field(init=False)
+    status: Path = field(init=False)
+    dashboard_html: Path = field(init=False)
+    dashboard_template: Path = field(init=False)
+    analytics_html: Path = field(init=False)
+    analytics_template: Path = field(init=False)
+    viz_html: Path = field(init=False)
+    viz_template: Path = field(init=False)
+    last_query: Path = field(init=False)
+
+    def __post_init__(self) -> None:
+        base = self.base_dir
+        set_attr = object.__setattr__
+        set_attr(self, "config", base / "atc_config.json")
+        set_attr(self, "state", base / "atc_state.json")
+        set_attr(self, "email_state", base / "atc_email_state.json")
+        set_attr(self, "events_log", base / "atc_events_log.json")
+        set_attr(self, "status", base / "atc_status.json")
+        set_attr(self, "dashboard_html", base / "atc_dashboard.html")
+        set_attr(self, "dashboard_template", base / "dashboard_template.html")
+        set_attr(self, "analytics_html", base / "atc_analytics.html")
+        set_attr(self, "analytics_template", base / "analytics_template.html")
+        set_attr(self, "viz_html", base / "atc_viz.html")
+        set_attr(self, "viz_template", base / "viz_template.html")
+        set_attr(self, "last_query", base / "last_atc_query.sql")
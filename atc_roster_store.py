@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 import json
+import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import atc_json
+
 
 SHIFTS = ("Shift A1", "Shift A2", "Shift B1", "Off Shift")
 
+# Non-whitespace on both sides of an "@", checked in one C-level pass
+# instead of a truthiness test plus a substring scan.
+_EMAIL_OK = re.compile(r"^\S+@\S+$").match
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Roster:
     inbound_by_shift: dict[str, list[str]]
 
@@ -18,6 +25,19 @@ class Roster:
         return list(self.inbound_by_shift.get(shift_label, []))
 
 
+def _clean_addresses(raw: list[Any]) -> list[str]:
+    # One str()/strip()/lower() per entry, dedup while walking, sort once.
+    seen: set[str] = set()
+    out: list[str] = []
+    for x in raw:
+        s = str(x).strip().lower()
+        if s not in seen and _EMAIL_OK(s):
+            seen.add(s)
+            out.append(s)
+    out.sort()
+    return out
+
+
 def load_roster(path: Path) -> Roster:
     """Load roster JSON.
 
@@ -28,7 +48,7 @@ def load_roster(path: Path) -> Roster:
         return Roster(inbound_by_shift={s: [] for s in SHIFTS})
 
     try:
-        payload: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+        payload: dict[str, Any] = atc_json.loads(path.read_bytes())
     except json.JSONDecodeError:
         return Roster(inbound_by_shift={s: [] for s in SHIFTS})
 
@@ -38,9 +58,7 @@ def load_roster(path: Path) -> Roster:
     inbound_by_shift: dict[str, list[str]] = {s: [] for s in SHIFTS}
     for s in SHIFTS:
         raw = inbound.get(s, [])
-        if not isinstance(raw, list):
-            continue
-        cleaned = sorted({str(x).strip().lower() for x in raw if str(x).strip() and "@" in str(x)})
-        inbound_by_shift[s] = cleaned
+        if isinstance(raw, list):
+            inbound_by_shift[s] = _clean_addresses(raw)
 
     return Roster(inbound_by_shift=inbound_by_shift)
@@ -1,13 +1,33 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import requests
+import atc_json
 
+if TYPE_CHECKING:
+    import requests
 
-@dataclass(frozen=True)
+
+# Keep-alive session: reusing the TCP/TLS connection saves a handshake on
+# every webhook POST after the first. Built lazily so importing this module
+# doesn't pay for requests/urllib3 when nothing is ever posted.
+_session_instance: requests.Session | None = None
+
+
+def _session() -> requests.Session:
+    global _session_instance
+    if _session_instance is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        s = requests.Session()
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _session_instance = s
+    return _session_instance
+
+
+@dataclass(frozen=True, slots=True)
 class TeamsWebhookConfig:
     webhook_url: str
 
@@ -36,9 +56,9 @@ def post_teams_message(*, cfg: TeamsWebhookConfig, title: str, lines: list[str])
         "text": text,
     }
 
-    resp = requests.post(
+    resp = _session().post(
         url,
-        data=json.dumps(payload),
+        data=atc_json.dumps_bytes(payload),
         headers={"Content-Type": "application/json"},
         timeout=15,
     )
@@ -6,15 +6,23 @@ Purpose:
 
 Run:
   atc_env\Scripts\python.exe bq_smoke_test.py
+
+Optional:
+  atc_env\Scripts\python.exe bq_smoke_test.py --sdk
+  (runs SELECT 1 in-process via google-cloud-bigquery instead of spawning
+  the bq CLI; skips the ~1-2s subprocess + SDK import cost but needs the
+  package installed and ADC configured)
 """
 
 from __future__ import annotations
 
-import json
+import argparse
 import subprocess
 import sys
 from pathlib import Path
 
+import atc_json
+
 
 def _resolve_bq_argv(bq_path: str) -> list[str]:
     """Return argv to invoke bq reliably.
@@ -43,10 +51,34 @@ CONFIG_PATH = BASE_DIR / "atc_config.json"
 
 
 def load_config() -> dict:
-    return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    return atc_json.loads(CONFIG_PATH.read_bytes())
+
+
+def _run_sdk_query(project_id: str | None) -> int:
+    """Run SELECT 1 in-process via google-cloud-bigquery.
+
+    The production poll loop deliberately shells out to bq (less auth drama),
+    so the SDK is not a hard dependency — import it only when asked for.
+    """
+
+    try:
+        from google.cloud import bigquery
+    except ImportError:
+        print("google-cloud-bigquery is not installed; run without --sdk or pip install it.")
+        return 1
+
+    print("\n=== running in-process query (SELECT 1) ===")
+    client = bigquery.Client(project=project_id)
+    rows = list(client.query("SELECT 1 AS ok").result())
+    print("rows:", [dict(r) for r in rows])
+    return 0
 
 
 def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sdk", action="store_true", help="query in-process via google-cloud-bigquery")
+    args = ap.parse_args()
+
     cfg = load_config()
     bq_path = cfg.get("bigquery", {}).get("bq_path")
     billing_project = cfg.get("bigquery", {}).get("billing_project")
@@ -58,6 +90,9 @@ def main() -> None:
     print(f"job_project: {job_project}")
     print(f"project_id used for jobs: {project_id}")
 
+    if args.sdk:
+        raise SystemExit(_run_sdk_query(project_id))
+
     # 1) show gcloud account(s)
     print("\n=== gcloud auth list (best-effort) ===")
     try:
@@ -21,42 +21,25 @@ Optional:
 from __future__ import annotations
 
 import argparse
-import json
+from bisect import bisect_left, bisect_right
 from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+import atc_json
+from atc_debug_events import load_event_rows
+
 BASE_DIR = Path(__file__).resolve().parent
 
 
 def _load_json(path: Path) -> dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def _norm(s: Any) -> str:
-    return str(s or "").strip()
-
-
-def _parse_detected_at(s: str) -> datetime | None:
-    s = (s or "").strip()
-    if not s:
-        return None
-    try:
-        return datetime.fromisoformat(s)
-    except Exception:
-        return None
-
-
-def _mode(values: list[str]) -> str:
-    c = Counter([v for v in values if v])
-    if not c:
-        return ""
-    return c.most_common(1)[0][0]
+    return atc_json.loads(path.read_bytes())
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DeliveryShiftStats:
     delivery: str
     notified_at: datetime | None
@@ -72,34 +55,35 @@ def main() -> int:
     ap.add_argument("--limit", type=int, default=50)
     args = ap.parse_args()
 
-    events_log = _load_json(BASE_DIR / "atc_events_log.json")
     email_state = _load_json(BASE_DIR / "atc_email_state.json")
 
     notified_map = email_state.get("emailed_deliveries", {})
     if not isinstance(notified_map, dict):
         notified_map = {}
 
-    events = events_log.get("events", [])
-    if not isinstance(events, list):
-        events = []
+    window = timedelta(minutes=int(args.window_minutes))
 
-    # Group events by delivery
-    by_delivery: dict[str, list[dict[str, Any]]] = {}
-    for e in events:
-        if not isinstance(e, dict):
-            continue
-        d = _norm(e.get("delivery_number"))
-        if not d:
+    # Single pass over the pre-parsed rows (pickle-cached next to the log):
+    # unnotified deliveries are rejected up front (that's most events), and
+    # each delivery accumulates a Counter plus (detected_at, shift) pairs
+    # for the notify-window lookup below.
+    by_delivery: dict[str, tuple[Counter, list[tuple[datetime, str]]]] = {}
+    for d, shift, det_epoch, _rec_epoch in load_event_rows(BASE_DIR / "atc_events_log.json"):
+        if not d or d not in notified_map:
             continue
-        by_delivery.setdefault(d, []).append(e)
 
-    window = timedelta(minutes=int(args.window_minutes))
+        entry = by_delivery.get(d)
+        if entry is None:
+            entry = by_delivery[d] = (Counter(), [])
 
-    stats: list[DeliveryShiftStats] = []
-    for delivery, evs in by_delivery.items():
-        if delivery not in notified_map:
-            continue
+        if shift:
+            entry[0][shift] += 1
+
+        if det_epoch:
+            entry[1].append((datetime.fromtimestamp(det_epoch), shift))
 
+    stats: list[DeliveryShiftStats] = []
+    for delivery, (counts, timed) in by_delivery.items():
         # notified_at is epoch seconds in emailed_deliveries
         try:
             notified_epoch = int(notified_map[delivery])
@@ -107,23 +91,19 @@ def main() -> int:
         except Exception:
             notified_at = None
 
-        shifts_all = [_norm(e.get("shift_label")) for e in evs if _norm(e.get("shift_label"))]
-        shift_mode_all = _mode(shifts_all)
-        counts_all = dict(Counter(shifts_all))
+        shift_mode_all = counts.most_common(1)[0][0] if counts else ""
+        counts_all = dict(counts)
 
         shifts_near: list[str] = []
-        if notified_at is not None:
-            lo = notified_at - window
-            hi = notified_at + window
-            for e in evs:
-                dt = _parse_detected_at(_norm(e.get("detected_at")))
-                if dt is None:
-                    continue
-                if lo <= dt <= hi:
-                    shifts_near.append(_norm(e.get("shift_label")))
-
-        shift_mode_near = _mode(shifts_near) if shifts_near else ""
-        counts_near = dict(Counter([s for s in shifts_near if s]))
+        if notified_at is not None and timed:
+            timed.sort(key=itemgetter(0))
+            lo = bisect_left(timed, notified_at - window, key=itemgetter(0))
+            hi = bisect_right(timed, notified_at + window, key=itemgetter(0))
+            shifts_near = [s for _, s in timed[lo:hi]]
+
+        near_counts = Counter(s for s in shifts_near if s)
+        shift_mode_near = near_counts.most_common(1)[0][0] if near_counts else ""
+        counts_near = dict(near_counts)
 
         stats.append(
             DeliveryShiftStats(
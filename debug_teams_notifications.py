@@ -17,16 +17,19 @@ Optional:
 from __future__ import annotations
 
 import argparse
-import json
+import os
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+import atc_json
+from atc_debug_events import EventRow, load_event_rows
+
 BASE_DIR = Path(__file__).resolve().parent
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DebugResult:
     last_teams_sent: datetime | None
     last_outbox_mtime: datetime | None
@@ -34,28 +37,26 @@ class DebugResult:
 
 
 def _load_json(path: Path) -> dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def _parse_dt(s: str) -> datetime | None:
-    s = (s or "").strip()
-    if not s:
-        return None
-    try:
-        # expected: 2026-01-29T10:26:46
-        return datetime.fromisoformat(s)
-    except Exception:
-        return None
+    return atc_json.loads(path.read_bytes())
 
 
 def _latest_outbox_mtime(outbox: Path) -> datetime | None:
-    if not outbox.exists():
+    # scandir yields DirEntry objects whose stat is batched with the readdir,
+    # so each file is touched once and no Path objects are built.
+    max_mtime: float | None = None
+    try:
+        with os.scandir(outbox) as it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+                if max_mtime is None or mtime > max_mtime:
+                    max_mtime = mtime
+    except OSError:
         return None
-    files = [p for p in outbox.glob("*") if p.is_file()]
-    if not files:
+    if max_mtime is None:
         return None
-    newest = max(files, key=lambda p: p.stat().st_mtime)
-    return datetime.fromtimestamp(newest.stat().st_mtime)
+    return datetime.fromtimestamp(max_mtime)
 
 
 def _last_teams_sent(email_state: dict[str, Any]) -> datetime | None:
@@ -66,32 +67,19 @@ def _last_teams_sent(email_state: dict[str, Any]) -> datetime | None:
     return datetime.fromtimestamp(max(ts))
 
 
-def _latest_detected_at(events_log: dict[str, Any]) -> datetime | None:
-    events = events_log.get("events", []) or []
-    dts = [_parse_dt(e.get("detected_at", "")) for e in events]
-    dts = [d for d in dts if d is not None]
-    return max(dts) if dts else None
-
-
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--since-hours", type=float, default=None)
     args = ap.parse_args()
 
-    events_log = _load_json(BASE_DIR / "atc_events_log.json")
     email_state = _load_json(BASE_DIR / "atc_email_state.json")
 
-    emailed_deliveries: set[str] = set((email_state.get("emailed_deliveries", {}) or {}).keys())
+    # dict __contains__ is the same hash lookup as set membership; no need to
+    # copy the keys into a fresh set.
+    emailed_deliveries: dict[str, Any] = email_state.get("emailed_deliveries") or {}
 
     last_teams = _last_teams_sent(email_state)
     last_outbox = _latest_outbox_mtime(BASE_DIR / "outbox_emails")
-    latest_detected = _latest_detected_at(events_log)
-
-    print("=== ATC Teams Notification Debug ===")
-    print("Now:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    print("Last teams sent:", last_teams)
-    print("Last outbox write:", last_outbox)
-    print("Latest detected_at in log:", latest_detected)
 
     since = None
     if args.since_hours is not None:
@@ -99,57 +87,63 @@ def main() -> int:
     elif last_teams is not None:
         since = last_teams
 
+    # Single pass over the pre-parsed rows (pickle-cached next to the log):
+    # track the latest detected_at, count events past the cutoff, and group
+    # those by delivery (for rec_dt lag). Timestamps are epoch floats, so the
+    # cutoff is one float compare per event.
+    since_epoch = since.timestamp() if since is not None else None
+    latest_epoch = 0.0
+    after_count = 0
+    by_delivery: dict[str, list[EventRow]] = {}
+
+    for row in load_event_rows(BASE_DIR / "atc_events_log.json"):
+        det_epoch = row[2]
+        if det_epoch > latest_epoch:
+            latest_epoch = det_epoch
+        if since_epoch is None or det_epoch <= since_epoch:
+            continue
+        after_count += 1
+        d = row[0]
+        if d:
+            by_delivery.setdefault(d, []).append(row)
+
+    latest_detected = datetime.fromtimestamp(latest_epoch) if latest_epoch else None
+
+    print("=== ATC Teams Notification Debug ===")
+    print("Now:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    print("Last teams sent:", last_teams)
+    print("Last outbox write:", last_outbox)
+    print("Latest detected_at in log:", latest_detected)
+
     if since is None:
         print("No cutoff time available (no last teams sent, and --since-hours not provided).")
         return 0
 
-    events = events_log.get("events", []) or []
-    after = []
-    for e in events:
-        dt = _parse_dt(e.get("detected_at", ""))
-        if dt is None or dt <= since:
-            continue
-        after.append(e)
-
-    deliveries = sorted({str(e.get("delivery_number", "")).strip() for e in after if str(e.get("delivery_number", "")).strip()})
+    deliveries = sorted(by_delivery.keys())
 
     print("\nCutoff:", since)
-    print("Events after cutoff:", len(after))
+    print("Events after cutoff:", after_count)
     print("Distinct deliveries after cutoff:", len(deliveries))
 
-    # Aggregate per delivery so we can spot rec_dt lag vs detected_at.
-    by_delivery: dict[str, list[dict[str, Any]]] = {}
-    for e in after:
-        d = str(e.get("delivery_number", "")).strip()
-        if not d:
-            continue
-        by_delivery.setdefault(d, []).append(e)
-
-    def parse_rec_dt(s: str) -> datetime | None:
-        s = (s or "").strip()
-        if not s:
-            return None
-        # BigQuery DATETIME-ish, often with fractional seconds.
-        try:
-            return datetime.fromisoformat(s.replace(" ", "T"))
-        except Exception:
-            if "." in s:
-                base = s.split(".", 1)[0]
-                try:
-                    return datetime.fromisoformat(base.replace(" ", "T"))
-                except Exception:
-                    return None
-            return None
-
     for d in deliveries[:25]:
-        evs = by_delivery.get(d, [])
-        shifts = sorted({str(x.get("shift_label", "")).strip() for x in evs if str(x.get("shift_label", "")).strip()})
-        rec_dts = [parse_rec_dt(str(x.get("rec_dt", ""))) for x in evs]
-        rec_dts = [x for x in rec_dts if x is not None]
-        det_dts = [_parse_dt(str(x.get("detected_at", ""))) for x in evs]
-        det_dts = [x for x in det_dts if x is not None]
-        rec_range = (min(rec_dts), max(rec_dts)) if rec_dts else (None, None)
-        det_range = (min(det_dts), max(det_dts)) if det_dts else (None, None)
+        # One sweep per delivery: shifts, rec_dt range, and detected_at range
+        # all fold in the same pass instead of five comprehensions.
+        shift_set: set[str] = set()
+        rec_min = rec_max = 0.0
+        det_min = det_max = 0.0
+        for _d, shift, det_epoch, rec_epoch in by_delivery.get(d, []):
+            if shift:
+                shift_set.add(shift)
+            if rec_epoch:
+                if not rec_min or rec_epoch < rec_min:
+                    rec_min = rec_epoch
+                if rec_epoch > rec_max:
+                    rec_max = rec_epoch
+            if det_epoch:
+                if not det_min or det_epoch < det_min:
+                    det_min = det_epoch
+                if det_epoch > det_max:
+                    det_max = det_epoch
 
         print(
             "-",
@@ -157,15 +151,15 @@ def main() -> int:
             "deduped=",
             (d in emailed_deliveries),
             "shift=",
-            ",".join(shifts) if shifts else "-",
+            ",".join(sorted(shift_set)) if shift_set else "-",
             "rec_dt=",
-            rec_range[0],
+            datetime.fromtimestamp(rec_min) if rec_min else None,
             "..",
-            rec_range[1],
+            datetime.fromtimestamp(rec_max) if rec_max else None,
             "detected_at=",
-            det_range[0],
+            datetime.fromtimestamp(det_min) if det_min else None,
             "..",
-            det_range[1],
+            datetime.fromtimestamp(det_max) if det_max else None,
         )
 
     if len(deliveries) > 25:
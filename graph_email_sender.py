@@ -11,20 +11,55 @@ We keep this separate from ATC logic (SRP).
 
 from __future__ import annotations
 
-import json
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import msal
-import requests
+import atc_json
+
+if TYPE_CHECKING:
+    import msal
+    import requests
 
 
 GRAPH_SCOPE = ["https://graph.microsoft.com/Mail.Send"]
 GRAPH_ENDPOINT = "https://graph.microsoft.com/v1.0"
 
+# Keep-alive session: graph.microsoft.com TLS handshakes dominate request
+# time under burst load, so reuse the connection across sends. Built lazily
+# so importing this module doesn't pay for requests/urllib3 when the daemon
+# never sends.
+_session_instance: requests.Session | None = None
+
+
+def _session() -> requests.Session:
+    global _session_instance
+    if _session_instance is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        s = requests.Session()
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _session_instance = s
+    return _session_instance
+
+
+class _TokenState:
+    """Process-wide memo for the current access token.
 
-@dataclass(frozen=True)
+    Reading/deserializing the MSAL cache and running the silent flow costs
+    tens of ms per call; a burst of emails doesn't need to repeat it while
+    the token is still fresh.
+    """
+
+    token: str = ""
+    expires_at: float = 0.0
+    lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
 class GraphConfig:
     tenant: str
     client_id: str
@@ -32,7 +67,18 @@ class GraphConfig:
     token_cache_file: str
 
 
+@dataclass(frozen=True, slots=True)
+class MailMessage:
+    subject: str
+    html_body: str
+    to_recipients: list[str]
+
+
 def _build_cache(cache_path: Path) -> msal.SerializableTokenCache:
+    # msal drags in cryptography (~hundreds of ms of import); defer it to the
+    # first actual send instead of taxing every importer.
+    import msal
+
     cache = msal.SerializableTokenCache()
     if cache_path.exists():
         cache.deserialize(cache_path.read_text(encoding="utf-8"))
@@ -44,7 +90,9 @@ def _persist_cache(cache: msal.SerializableTokenCache, cache_path: Path) -> None
         cache_path.write_text(cache.serialize(), encoding="utf-8")
 
 
-def _acquire_token(cache: msal.SerializableTokenCache, cfg: GraphConfig) -> str:
+def _acquire_token(cache: msal.SerializableTokenCache, cfg: GraphConfig) -> tuple[str, float]:
+    import msal
+
     authority = f"https://login.microsoftonline.com/{cfg.tenant}"
     app = msal.PublicClientApplication(cfg.client_id, authority=authority, token_cache=cache)
 
@@ -68,7 +116,41 @@ def _acquire_token(cache: msal.SerializableTokenCache, cfg: GraphConfig) -> str:
     if not result or "access_token" not in result:
         raise RuntimeError(f"Failed to acquire Graph token: {result}")
 
-    return str(result["access_token"])
+    try:
+        expires_in = float(result.get("expires_in", 0))
+    except (TypeError, ValueError):
+        expires_in = 0.0
+    return str(result["access_token"]), time.time() + expires_in
+
+
+def _get_token(cfg: GraphConfig) -> str:
+    # Fast path: reuse the memoized token until a minute before expiry.
+    if _TokenState.token and time.time() < _TokenState.expires_at - 60:
+        return _TokenState.token
+
+    with _TokenState.lock:
+        if _TokenState.token and time.time() < _TokenState.expires_at - 60:
+            return _TokenState.token
+
+        cache_path = Path(cfg.token_cache_file)
+        cache = _build_cache(cache_path)
+        token, expires_at = _acquire_token(cache, cfg)
+        _persist_cache(cache, cache_path)
+
+        _TokenState.token = token
+        _TokenState.expires_at = expires_at
+        return token
+
+
+def _mail_payload(subject: str, html_body: str, to_recipients: list[str]) -> dict[str, Any]:
+    return {
+        "message": {
+            "subject": subject,
+            "body": {"contentType": "HTML", "content": html_body},
+            "toRecipients": [{"emailAddress": {"address": addr}} for addr in to_recipients],
+        },
+        "saveToSentItems": "true",
+    }
 
 
 def send_mail(
@@ -86,30 +168,70 @@ def send_mail(
     if not cfg.client_id.strip():
         raise ValueError("Graph client_id is required (config.email_notifications.graph.client_id)")
 
-    cache_path = Path(cfg.token_cache_file)
-    cache = _build_cache(cache_path)
-    token = _acquire_token(cache, cfg)
-    _persist_cache(cache, cache_path)
+    token = _get_token(cfg)
 
     url = f"{GRAPH_ENDPOINT}/users/{cfg.sender}/sendMail"
-    payload = {
-        "message": {
-            "subject": subject,
-            "body": {"contentType": "HTML", "content": html_body},
-            "toRecipients": [{"emailAddress": {"address": addr}} for addr in to_recipients],
-        },
-        "saveToSentItems": "true",
-    }
+    payload = _mail_payload(subject, html_body, to_recipients)
 
-    resp = requests.post(
+    resp = _session().post(
         url,
         headers={
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         },
-        data=json.dumps(payload),
+        data=atc_json.dumps_bytes(payload),
         timeout=30,
     )
 
     if resp.status_code not in (202, 200):
         raise RuntimeError(f"Graph sendMail failed: {resp.status_code} {resp.text}")
+
+
+def send_mail_many(*, cfg: GraphConfig, messages: list[MailMessage]) -> None:
+    """Send several emails in one round trip using Graph JSON batching.
+
+    /$batch takes up to 20 operations per request, so N sends cost
+    ceil(N/20) round trips instead of N, all on one bearer token.
+    """
+
+    if not cfg.client_id.strip():
+        raise ValueError("Graph client_id is required (config.email_notifications.graph.client_id)")
+    if not messages:
+        return
+
+    token = _get_token(cfg)
+    send_url = f"/users/{cfg.sender}/sendMail"
+
+    for start in range(0, len(messages), 20):
+        chunk = messages[start : start + 20]
+        batch = {
+            "requests": [
+                {
+                    "id": str(i + 1),
+                    "method": "POST",
+                    "url": send_url,
+                    "headers": {"Content-Type": "application/json"},
+                    "body": _mail_payload(m.subject, m.html_body, m.to_recipients),
+                }
+                for i, m in enumerate(chunk)
+            ]
+        }
+
+        resp = _session().post(
+            f"{GRAPH_ENDPOINT}/$batch",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            data=atc_json.dumps_bytes(batch),
+            timeout=60,
+        )
+        if resp.status_code != 200:
+            raise RuntimeError(f"Graph $batch failed: {resp.status_code} {resp.text}")
+
+        # $batch returns 200 even when individual operations fail.
+        failed = [
+            r for r in resp.json().get("responses", []) if int(r.get("status", 0)) not in (200, 202)
+        ]
+        if failed:
+            raise RuntimeError(f"Graph $batch sendMail failed for {len(failed)} message(s): {failed}")
@@ -3,7 +3,7 @@
 Westly-style architecture:
 - Poll BigQuery on an interval (via `bq` CLI)
 - Detect NEW manual receiving events using a persisted state file
-- Send Windows toast notifications (plyer)
+- Send Windows toast notifications (winrt Toast API, plyer fallback)
 - Persist last-24h events into a JSON event log
 - Generate a static HTML dashboard file for a tiny Flask server to serve
 
@@ -20,20 +20,26 @@ Run (silent):
 
 from __future__ import annotations
 
-import csv
 import json
+import os
 import shutil
 import subprocess
 import sys
 import time
+from bisect import bisect_left
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from html import escape
+from operator import itemgetter
 from pathlib import Path
 from typing import Any, Iterable
 
-from plyer import notification
+import jinja2
 
+import atc_json
 from atc_delivery_notifications import notify_new_deliveries
 
 
@@ -75,58 +81,135 @@ def _now_iso() -> str:
     return datetime.now().isoformat(timespec="seconds")
 
 
+@lru_cache(maxsize=4096)
+def _parse_rec_dt(s: str) -> datetime | None:
+    """Parse a rec_dt/detected_at string, best-effort.
+
+    3.11's C fromisoformat covers everything the sources emit: space or T
+    separator, missing seconds, fractional seconds, Z/offset suffixes.
+    Offset-aware results are normalized to naive local time since callers
+    compare against naive cutoffs. Cached because the log repeats the same
+    timestamp strings many times per cycle.
+    """
+
+    s = (s or "").strip()
+    if not s:
+        return None
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
 def load_config() -> dict[str, Any]:
     try:
-        return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+        # Bytes in: orjson parses the raw buffer, skipping a UTF-8 decode pass.
+        return atc_json.loads(CONFIG_PATH.read_bytes())
     except FileNotFoundError:
         raise SystemExit(f"Missing config: {CONFIG_PATH}")
     except json.JSONDecodeError as e:
         raise SystemExit(f"Invalid JSON in {CONFIG_PATH}: {e}")
 
 
+def _write_json_atomic(path: Path, payload: Any) -> None:
+    # Atomic-ish write (tmp sibling + os.replace) so a crash mid-write can't
+    # leave a torn file; atc_json serializes in C when orjson is present.
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(atc_json.dumps_bytes(payload, indent=True))
+    os.replace(tmp, path)
+
+
+# This process is the only writer of state/log, so after the first read they
+# live in module globals and the poll loop never reparses its own output.
+# Disk writes go through a one-worker executor so the loop doesn't block on
+# them; atexit drains the queue, so nothing is lost on a clean stop.
+_STATE_CACHE: dict[str, Any] | None = None
+_LOG_CACHE: dict[str, Any] | None = None
+_SEEN_CACHE: set[str] | None = None
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+def _write_json_async(path: Path, payload: Any) -> None:
+    def _task() -> None:
+        try:
+            _write_json_atomic(path, payload)
+        except OSError as e:
+            print(f"[ERROR] Failed writing {path.name}: {e}", flush=True)
+
+    _IO_EXECUTOR.submit(_task)
+
+
 def load_state() -> dict[str, Any]:
-    if not STATE_PATH.exists():
-        return {"last_check": None, "seen_event_ids": []}
+    global _STATE_CACHE
+    if _STATE_CACHE is not None:
+        return _STATE_CACHE
 
-    try:
-        payload = json.loads(STATE_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return {"last_check": None, "seen_event_ids": []}
+    state = {"last_check": None, "seen_event_ids": []}
+    if STATE_PATH.exists():
+        try:
+            payload = atc_json.loads(STATE_PATH.read_bytes())
+        except (OSError, json.JSONDecodeError):
+            payload = None
+
+        if isinstance(payload, dict):
+            seen = payload.get("seen_event_ids")
+            if not isinstance(seen, list):
+                seen = []
+            state = {"last_check": payload.get("last_check"), "seen_event_ids": seen}
 
-    if not isinstance(payload, dict):
-        return {"last_check": None, "seen_event_ids": []}
+    _STATE_CACHE = state
+    return state
 
-    seen = payload.get("seen_event_ids")
-    if not isinstance(seen, list):
-        seen = []
 
-    return {"last_check": payload.get("last_check"), "seen_event_ids": seen}
+def _seen_ids() -> set[str]:
+    """The in-memory membership set for container-id dedupe.
+
+    Built from state once per process and mutated in place afterwards, so
+    steady-state cycles never rebuild a 5000-element set from the JSON list.
+    It may hold ids the on-disk prune already dropped; that only makes
+    dedupe more conservative until the next restart.
+    """
+
+    global _SEEN_CACHE
+    if _SEEN_CACHE is None:
+        _SEEN_CACHE = set(load_state().get("seen_event_ids", []))
+    return _SEEN_CACHE
 
 
 def save_state(seen_event_ids: list[str]) -> None:
+    global _STATE_CACHE
     # Prune so the file doesn't grow forever.
     pruned = seen_event_ids[-5000:]
     payload = {"last_check": _now_iso(), "seen_event_ids": pruned}
-    STATE_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    _STATE_CACHE = payload
+    _write_json_async(STATE_PATH, payload)
 
 
 def load_events_log() -> dict[str, Any]:
-    if not EVENTS_LOG_PATH.exists():
-        return {"events": []}
+    global _LOG_CACHE
+    if _LOG_CACHE is not None:
+        return _LOG_CACHE
 
-    try:
-        payload = json.loads(EVENTS_LOG_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return {"events": []}
+    payload_out = {"events": []}
+    if EVENTS_LOG_PATH.exists():
+        try:
+            payload = atc_json.loads(EVENTS_LOG_PATH.read_bytes())
+        except (OSError, json.JSONDecodeError):
+            payload = None
 
-    if not isinstance(payload, dict) or not isinstance(payload.get("events"), list):
-        return {"events": []}
+        if isinstance(payload, dict) and isinstance(payload.get("events"), list):
+            payload_out = payload
 
-    return payload
+    _LOG_CACHE = payload_out
+    return payload_out
 
 
 def save_events_log(events: list[dict[str, Any]]) -> None:
-    EVENTS_LOG_PATH.write_text(json.dumps({"events": events}, indent=2), encoding="utf-8")
+    global _LOG_CACHE
+    payload = {"events": events}
+    _LOG_CACHE = payload
+    _write_json_async(EVENTS_LOG_PATH, payload)
 
 
 def _bq_query_sql(config: dict[str, Any]) -> str:
@@ -141,22 +224,39 @@ def _bq_query_sql(config: dict[str, Any]) -> str:
     - Filter BOTH source tables by time window before joining
     - Reduce RECEIVING_ITEM to the *latest row per container* in the window
     - Make expensive vendor name join optional
-    """
 
-    facility_id = config["monitoring"]["facility_id"]
-    tz = config["monitoring"].get("timezone", "America/New_York")
-    overflow_locations: list[str] = config["monitoring"].get("overflow_locations", [])
-    query_window_minutes = int(config.get("monitoring", {}).get("query_window_minutes", 60))
+    Config values travel as @-parameters (see _bq_query_params) rather than
+    being interpolated, so the SQL text is constant per vendor flag. That
+    keeps the job hash stable across runs, which lets BigQuery reuse its
+    cached query plan (and result cache when the data hasn't moved), and
+    removes any injection path through config strings.
+    """
 
     include_vendor = bool(config.get("bigquery", {}).get("include_vendor_name", False))
 
-    # Overflow/exempt locations should not appear in the dashboard/alerts.
-    overflow_filter = ""
-    if overflow_locations:
-        # Compare case-insensitively; some sources emit location_id as lowercase.
-        quoted = ", ".join([f"'{str(x).strip().upper()}'" for x in overflow_locations])
-        overflow_filter = f"\n      AND UPPER(TRIM(CAST(r.LOCATION_ID AS STRING))) NOT IN ({quoted})"
+    return _bq_query_sql_cached(include_vendor)
+
 
+def _bq_query_params(config: dict[str, Any]) -> list[tuple[str, str, Any]]:
+    """(name, type, value) triples for the @-parameters in the poll query.
+
+    Runner-neutral shape: the CLI path formats these as --parameter flags
+    and the SDK path wraps them in QueryJobConfig parameters.
+    """
+
+    monitoring = config.get("monitoring", {})
+    # Compare case-insensitively; some sources emit location_id as lowercase.
+    overflow = [str(x).strip().upper() for x in monitoring.get("overflow_locations", [])]
+    return [
+        ("facility_id", "STRING", config["monitoring"]["facility_id"]),
+        ("tz", "STRING", monitoring.get("timezone", "America/New_York")),
+        ("window_minutes", "INT64", int(monitoring.get("query_window_minutes", 60))),
+        ("overflow", "ARRAY<STRING>", overflow),
+    ]
+
+
+@lru_cache(maxsize=2)
+def _bq_query_sql_cached(include_vendor: bool) -> str:
     vendor_cte = ""
     vendor_select = "'' AS vendor_name"
     vendor_joins = ""
@@ -196,9 +296,12 @@ WITH
       SAFE_DIVIDE(r.ITEM_QTY, NULLIF(r.VNPK_QTY, 0)) AS CASE_QTY,
       r.ENTITY_OPERATION_TS
     FROM `wmt-edw-prod.US_SUPPLY_CHAIN_SCT_NONCAT_VM.RECEIVING_ITEM` r
-    WHERE r.FACILITY = '{facility_id}'
-      AND r.ENTITY_OPERATION_TS >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {query_window_minutes} MINUTE)
-      AND r.RCV_SET_ON_CONVEYOR_IND = TRUE{overflow_filter}
+    WHERE r.FACILITY = @facility_id
+      AND r.ENTITY_OPERATION_TS >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @window_minutes MINUTE)
+      AND r.RCV_SET_ON_CONVEYOR_IND = TRUE
+      -- Overflow/exempt locations should not appear in the dashboard/alerts.
+      -- NOT IN over an empty @overflow array is TRUE, so no branch needed.
+      AND UPPER(TRIM(CAST(r.LOCATION_ID AS STRING))) NOT IN UNNEST(@overflow)
     QUALIFY ROW_NUMBER() OVER (PARTITION BY r.CONTAINER_ID ORDER BY r.ENTITY_OPERATION_TS DESC) = 1
   ),
   c_filtered AS (
@@ -210,14 +313,14 @@ WITH
       ANY_VALUE(c.ITEM_DESC) AS ITEM_DESC,
       ANY_VALUE(c.DELIVERY_NUMBER) AS DELIVERY_NUMBER
     FROM `wmt-edw-prod.US_SUPPLY_CHAIN_SCT_NONCAT_VM.CONTAINER_ITEM_OPERATIONS` c
-    WHERE c.FACILITY = '{facility_id}'
+    WHERE c.FACILITY = @facility_id
       AND c.CONTAINER_ID IN (SELECT CONTAINER_ID FROM r_filtered)
     GROUP BY c.CONTAINER_ID, c.ITEM_NBR
   )
 {vendor_cte}
 
 SELECT
-  CAST(DATETIME(r.ENTITY_OPERATION_TS, '{tz}') AS STRING) AS rec_dt,
+  CAST(DATETIME(r.ENTITY_OPERATION_TS, @tz) AS STRING) AS rec_dt,
   CAST(r.LOCATION_ID AS STRING) AS location_id,
   CAST(c.CONTAINER_ID AS STRING) AS container_id,
   CAST(c.ITEM_NBR AS STRING) AS item_nbr,
@@ -228,19 +331,19 @@ SELECT
   CAST(r.CASE_QTY AS STRING) AS case_qty,
 
   CASE
-    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) IN (3,4,5,6)
-     AND EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) BETWEEN '04:30:00' AND '15:30:00'
+    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) IN (3,4,5,6)
+     AND EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) BETWEEN '04:30:00' AND '15:30:00'
     THEN 'Shift A1'
 
-    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) IN (3,4,5,6)
+    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) IN (3,4,5,6)
      AND (
-       EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) BETWEEN '15:30:00' AND '23:59:59'
-       OR EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) BETWEEN '00:00:00' AND '02:00:00'
+       EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) BETWEEN '15:30:00' AND '23:59:59'
+       OR EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) BETWEEN '00:00:00' AND '02:00:00'
      )
     THEN 'Shift A2'
 
-    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) IN (1,2,7)
-     AND EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, '{tz}')) BETWEEN '04:30:00' AND '18:00:00'
+    WHEN EXTRACT(DAYOFWEEK FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) IN (1,2,7)
+     AND EXTRACT(TIME FROM DATETIME(r.ENTITY_OPERATION_TS, @tz)) BETWEEN '04:30:00' AND '18:00:00'
     THEN 'Shift B1'
 
     ELSE 'Off Shift'
@@ -316,6 +419,76 @@ def _resolve_bq_argv(bq_path: str) -> list[str]:
     return [bq_path]
 
 
+_BQ_CLIENT: Any = None
+
+_LAST_WRITTEN_SQL: str | None = None
+
+
+def _persist_last_query(sql: str) -> None:
+    # Persist the last query for debugging/review. The SQL is constant now
+    # that config travels as query parameters, so skip the write (one syscall
+    # plus inotify noise per cycle) when nothing changed since our last write.
+    global _LAST_WRITTEN_SQL
+    if sql == _LAST_WRITTEN_SQL:
+        return
+    try:
+        LAST_QUERY_PATH.write_text(sql + "\n", encoding="utf-8")
+    except OSError:
+        return
+    _LAST_WRITTEN_SQL = sql
+
+
+def _run_bq_query_sdk(config: dict[str, Any], sql: str, billing_project: str | None) -> list[AtcEvent]:
+    """Run the poll query in-process via google-cloud-bigquery.
+
+    Opt-in through config.bigquery.use_sdk. query_and_wait hits the
+    jobs.query endpoint, which returns small result sets inline in one round
+    trip — no subprocess start, no Cloud SDK re-import, no CSV. The client
+    is cached for the process so later cycles reuse its connection pool.
+    """
+
+    from google.cloud import bigquery
+
+    global _BQ_CLIENT
+    if _BQ_CLIENT is None:
+        _BQ_CLIENT = bigquery.Client(project=billing_project)
+
+    _persist_last_query(sql)
+
+    query_parameters = [
+        bigquery.ArrayQueryParameter(name, "STRING", value)
+        if isinstance(value, list)
+        else bigquery.ScalarQueryParameter(name, typ, value)
+        for name, typ, value in _bq_query_params(config)
+    ]
+    job_config = bigquery.QueryJobConfig(use_legacy_sql=False, query_parameters=query_parameters)
+    rows = _BQ_CLIENT.query_and_wait(sql, job_config=job_config)
+
+    events: list[AtcEvent] = []
+    for row in rows:
+        container_id = str(row["container_id"] or "").strip()
+        if not container_id:
+            continue
+        try:
+            case_qty = float(row["case_qty"] or 0)
+        except (TypeError, ValueError):
+            case_qty = 0.0
+        events.append(
+            AtcEvent(
+                rec_dt=str(row["rec_dt"] or ""),
+                location_id=str(row["location_id"] or ""),
+                container_id=container_id,
+                item_nbr=str(row["item_nbr"] or ""),
+                item_desc=str(row["item_desc"] or ""),
+                vendor_name=str(row["vendor_name"] or ""),
+                delivery_number=str(row["delivery_number"] or ""),
+                shift_label=str(row["shift_label"] or ""),
+                case_qty=case_qty,
+            )
+        )
+    return events
+
+
 def _run_bq_query(config: dict[str, Any], sql: str, billing_project: str | None) -> str:
     """Run BigQuery via bq CLI.
 
@@ -325,11 +498,7 @@ def _run_bq_query(config: dict[str, Any], sql: str, billing_project: str | None)
     """
 
     bq_exe = _resolve_bq_exe(config)
-    # Persist the last query for debugging/review.
-    try:
-        LAST_QUERY_PATH.write_text(sql + "\n", encoding="utf-8")
-    except OSError:
-        pass
+    _persist_last_query(sql)
 
     print(f"[INFO] Using bq: {bq_exe}", flush=True)
 
@@ -337,8 +506,13 @@ def _run_bq_query(config: dict[str, Any], sql: str, billing_project: str | None)
         "query",
         "--quiet",
         "--use_legacy_sql=false",
-        "--format=csv",
+        "--format=json",
     ]
+    for name, typ, value in _bq_query_params(config):
+        if isinstance(value, list):
+            # Array parameters take a JSON list as their value.
+            value = atc_json.dumps_str(value)
+        base_args.append(f"--parameter={name}:{typ}:{value}")
     if billing_project:
         base_args.append(f"--project_id={billing_project}")
 
@@ -371,41 +545,51 @@ def _run_bq_query(config: dict[str, Any], sql: str, billing_project: str | None)
     return completed.stdout
 
 
-def _parse_events_csv(csv_text: str) -> list[AtcEvent]:
-    # bq CSV format includes header row.
-    reader = csv.DictReader(csv_text.splitlines())
-    events: list[AtcEvent] = []
+def _clean_cell(val: Any) -> str:
+    # Defensive defaults. BQ sometimes returns "NULL" strings.
+    s = str(val).strip() if val is not None else ""
+    return "" if s.upper() == "NULL" else s
 
-    for row in reader:
-        # Defensive defaults. BQ sometimes returns "NULL" strings.
-        def get(name: str) -> str:
-            val = (row.get(name) or "").strip()
-            return "" if val.upper() == "NULL" else val
-
-        def get_float(name: str) -> float:
-            s = get(name)
-            try:
-                return float(s) if s else 0.0
-            except ValueError:
-                return 0.0
-
-        event = AtcEvent(
-            rec_dt=get("rec_dt"),
-            location_id=get("location_id"),
-            container_id=get("container_id"),
-            item_nbr=get("item_nbr"),
-            item_desc=get("item_desc"),
-            vendor_name=get("vendor_name"),
-            delivery_number=get("delivery_number"),
-            shift_label=get("shift_label"),
-            case_qty=get_float("case_qty"),
-        )
 
+def _parse_events_json(json_text: str) -> list[AtcEvent]:
+    # bq --format=json emits one JSON array of row objects — parsed in one
+    # C-level pass instead of a DictReader plus per-field closures.
+    if not json_text.strip():
+        return []
+
+    rows = atc_json.loads(json_text)
+    if not isinstance(rows, list):
+        return []
+
+    events: list[AtcEvent] = []
+    # LOAD_FAST in the row loop, instead of a global + attribute walk per row.
+    clean = _clean_cell
+    append = events.append
+    for row in rows:
+        container_id = clean(row.get("container_id"))
         # Minimal sanity: ignore blank container ids.
-        if not event.container_id:
+        if not container_id:
             continue
 
-        events.append(event)
+        case_qty_s = clean(row.get("case_qty"))
+        try:
+            case_qty = float(case_qty_s) if case_qty_s else 0.0
+        except ValueError:
+            case_qty = 0.0
+
+        append(
+            AtcEvent(
+                rec_dt=clean(row.get("rec_dt")),
+                location_id=clean(row.get("location_id")),
+                container_id=container_id,
+                item_nbr=clean(row.get("item_nbr")),
+                item_desc=clean(row.get("item_desc")),
+                vendor_name=clean(row.get("vendor_name")),
+                delivery_number=clean(row.get("delivery_number")),
+                shift_label=clean(row.get("shift_label")),
+                case_qty=case_qty,
+            )
+        )
 
     return events
 
@@ -414,32 +598,9 @@ def _filter_recent(events: Iterable[AtcEvent], lookback_minutes: int) -> list[At
     # rec_dt is a string like "YYYY-MM-DD HH:MM:SS". Parse best-effort.
     cutoff = datetime.now() - timedelta(minutes=lookback_minutes)
 
-    def parse_dt(s: str) -> datetime | None:
-        s = (s or "").strip()
-        if not s:
-            return None
-
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-            try:
-                return datetime.strptime(s, fmt)
-            except ValueError:
-                pass
-
-        if "." in s:
-            base = s.split(".", 1)[0]
-            try:
-                return datetime.strptime(base, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                pass
-
-        try:
-            return datetime.fromisoformat(s.replace("Z", "+00:00"))
-        except ValueError:
-            return None
-
     out: list[AtcEvent] = []
     for e in events:
-        dt = parse_dt(e.rec_dt)
+        dt = _parse_rec_dt(e.rec_dt)
         if dt is None:
             continue
         if dt >= cutoff:
@@ -447,28 +608,81 @@ def _filter_recent(events: Iterable[AtcEvent], lookback_minutes: int) -> list[At
     return out
 
 
-def _send_notification(config: dict[str, Any], event: AtcEvent) -> None:
+# None = not tried yet, False = winrt unavailable, else the (notifier,
+# ToastNotification, XmlDocument) triple resolved on first use.
+_TOAST_BACKEND: Any = None
+
+
+def _show_toast(app_name: str, title: str, message: str, timeout: int) -> None:
+    """Show a Windows toast through the cheapest backend available.
+
+    winrt talks to the Toast API in-process — one COM call per toast —
+    where plyer re-probes its platform facade and shells out every time.
+    winrt isn't pinned in requirements, so anything missing (or a non-
+    Windows dev box) falls back to plyer, which handles its own platforms.
+    """
+
+    global _TOAST_BACKEND
+    if _TOAST_BACKEND is None:
+        try:
+            from winrt.windows.data.xml.dom import XmlDocument
+            from winrt.windows.ui.notifications import (
+                ToastNotification,
+                ToastNotificationManager,
+            )
+
+            _TOAST_BACKEND = (
+                ToastNotificationManager.create_toast_notifier_with_id(app_name),
+                ToastNotification,
+                XmlDocument,
+            )
+        except Exception:
+            _TOAST_BACKEND = False
+
+    if _TOAST_BACKEND:
+        notifier, toast_cls, xml_cls = _TOAST_BACKEND
+        xml = xml_cls()
+        xml.load_xml(
+            "<toast><visual><binding template='ToastGeneric'>"
+            f"<text>{escape(title)}</text><text>{escape(message)}</text>"
+            "</binding></visual></toast>"
+        )
+        try:
+            notifier.show(toast_cls(xml))
+            return
+        except Exception as e:
+            print(f"[WARN] winrt toast failed, falling back to plyer: {e}", flush=True)
+
+    from plyer import notification
+
+    notification.notify(title=title, message=message, app_name=app_name, timeout=timeout)
+
+
+def _send_aggregated_notification(config: dict[str, Any], events: list[AtcEvent]) -> None:
+    """Send ONE toast for the whole batch.
+
+    Toast delivery is synchronous (hundreds of ms on the plyer path); a
+    burst of 50 events must not block the poll loop for 50 toasts nobody
+    can read anyway.
+    """
+
+    if not events:
+        return
+
     app_name = config.get("notifications", {}).get("app_name", "Manual Receiving ATC")
     timeout = int(config.get("notifications", {}).get("duration_seconds", 600))
 
-    title = "[ALERT] Manual Receiving Event"
-    message = (
-        f"Facility: {config['monitoring']['facility_id']}\n"
-        f"Location: {event.location_id}\n"
-        f"Vendor: {event.vendor_name}\n"
-        f"Item: {event.item_nbr}\n"
-        f"Container: {event.container_id}\n"
-        f"Delivery: {event.delivery_number}\n"
-        f"Shift: {event.shift_label}\n"
-        f"Time: {event.rec_dt}"
-    )
+    n = len(events)
+    title = f"[ALERT] {n} new manual receiving event(s)"
+    lines = [f"Facility: {config['monitoring']['facility_id']}"]
+    for e in events[:5]:
+        lines.append(
+            f"{e.location_id} | Item {e.item_nbr} | Delivery {e.delivery_number} | {e.rec_dt}"
+        )
+    if n > 5:
+        lines.append(f"...and {n - 5} more")
 
-    notification.notify(
-        title=title,
-        message=message,
-        app_name=app_name,
-        timeout=timeout,
-    )
+    _show_toast(app_name, title, "\n".join(lines), timeout)
 
 
 def _event_key_from_dict(d: dict[str, Any]) -> str:
@@ -492,83 +706,106 @@ def upsert_events_to_log(events: list[AtcEvent], config: dict[str, Any]) -> None
     retention_days = int(config.get("monitoring", {}).get("event_log_retention_days", 1))
     cutoff = datetime.now() - timedelta(days=retention_days)
 
-    def parse_dt(s: str) -> datetime | None:
-        s = (s or "").strip()
-        if not s:
-            return None
-
-        # Common BigQuery DATETIME string
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-            try:
-                return datetime.strptime(s, fmt)
-            except ValueError:
-                pass
-
-        # Fractional seconds
-        if "." in s:
-            base = s.split(".", 1)[0]
-            try:
-                return datetime.strptime(base, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                pass
-
-        # ISO-ish
-        try:
-            return datetime.fromisoformat(s.replace("Z", "+00:00"))
-        except ValueError:
-            return None
-
-    # Keep only within retention window from existing.
-    kept: list[dict[str, Any]] = []
+    # The log is persisted sorted by rec_dt descending, and the strings are
+    # ISO-like, so when that holds the retention cut is a bisect on string
+    # keys — no datetime parse per row. One cheap comparison pass verifies
+    # the ordering; any surprise (empty/garbage rec_dt, unsorted legacy
+    # file) falls back to the parse-everything loop below.
+    keys: list[str] = []
+    sorted_desc = bool(existing)
+    prev: str | None = None
     for e in existing:
-        rec_dt = parse_dt(str(e.get("rec_dt", "")))
-        if rec_dt is None:
-            # Fall back to detected_at (controlled by us) so we never drop rows
-            # just because rec_dt format changed.
-            rec_dt = parse_dt(str(e.get("detected_at", "")))
-        if rec_dt is not None and rec_dt >= cutoff:
-            kept.append(e)
-
-    # Build index by event key so we can merge updates.
-    index: dict[str, dict[str, Any]] = { _event_key_from_dict(e): e for e in kept }
+        k = str(e.get("rec_dt", ""))
+        if not k or (prev is not None and k > prev):
+            sorted_desc = False
+            break
+        keys.append(k)
+        prev = k
+
+    index: dict[str, dict[str, Any]] = {}
+    cutoff_str = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+    if sorted_desc:
+        keep = len(existing) - bisect_left(keys[::-1], cutoff_str)
+        for e in existing[:keep]:
+            index[_event_key_from_dict(e)] = e
+    else:
+        # Unsorted/legacy file: still one string compare per row — rec_dt and
+        # detected_at are both fixed-width ISO-like, each checked against a
+        # cutoff rendered in its own format (detected_at uses a T separator).
+        # detected_at, which we write ourselves, is only consulted when
+        # rec_dt is absent.
+        cutoff_det_str = cutoff.isoformat(timespec="seconds")
+        for e in existing:
+            rec_dt = str(e.get("rec_dt", ""))
+            if (rec_dt >= cutoff_str) if rec_dt else (str(e.get("detected_at", "")) >= cutoff_det_str):
+                index[_event_key_from_dict(e)] = e
 
     for e in events:
         key = e.event_id()
-        if key in index:
-            # Update mutable fields (vendor name might appear later if join toggled on, etc.)
-            index[key].update(
-                {
-                    "rec_dt": e.rec_dt,
-                    "location_id": e.location_id,
-                    "container_id": e.container_id,
-                    "item_nbr": e.item_nbr,
-                    "item_desc": e.item_desc,
-                    "vendor_name": e.vendor_name,
-                    "delivery_number": e.delivery_number,
-                    "shift_label": e.shift_label,
-                "case_qty": e.case_qty,
-                    "case_qty": e.case_qty,
-                }
-            )
+        # Mutable fields (vendor name might appear later if join toggled on, etc.)
+        fields = {
+            "rec_dt": e.rec_dt,
+            "location_id": e.location_id,
+            "container_id": e.container_id,
+            "item_nbr": e.item_nbr,
+            "item_desc": e.item_desc,
+            "vendor_name": e.vendor_name,
+            "delivery_number": e.delivery_number,
+            "shift_label": e.shift_label,
+            "case_qty": e.case_qty,
+        }
+        row = index.get(key)
+        if row is None:
+            fields["detected_at"] = _now_iso()
+            index[key] = fields
         else:
-            index[key] = {
-                "rec_dt": e.rec_dt,
-                "location_id": e.location_id,
-                "container_id": e.container_id,
-                "item_nbr": e.item_nbr,
-                "item_desc": e.item_desc,
-                "vendor_name": e.vendor_name,
-                "delivery_number": e.delivery_number,
-                "shift_label": e.shift_label,
-                "case_qty": e.case_qty,
-                "detected_at": _now_iso(),
-            }
+            row.update(fields)
 
     merged = list(index.values())
-    merged.sort(key=lambda x: str(x.get("rec_dt", "")), reverse=True)
+    # rec_dt strings are ISO-like, so a plain string sort orders correctly;
+    # itemgetter skips the old per-key lambda + str() of an already-str value.
+    try:
+        merged.sort(key=itemgetter("rec_dt"), reverse=True)
+    except KeyError:
+        # Legacy rows that survived on detected_at alone may lack the key.
+        merged.sort(key=lambda x: str(x.get("rec_dt", "")), reverse=True)
     save_events_log(merged)
 
 
+# Compiled-template cache shared by the page writers: auto_reload=False and
+# an unbounded cache mean each template is read and compiled exactly once per
+# process, however often the writers run.
+_TEMPLATE_ENV = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(str(BASE_DIR)),
+    auto_reload=False,
+    cache_size=-1,
+    keep_trailing_newline=True,
+)
+
+
+def _render_template_html(src: Path, dst: Path, config: dict[str, Any], fallback_title: str) -> None:
+    # Skip the render entirely when the output is already at least as new as
+    # the template — saves a read+write of multi-KB HTML every start and
+    # keeps file watchers quiet.
+    try:
+        if dst.stat().st_mtime >= src.stat().st_mtime:
+            return
+    except OSError:
+        pass
+
+    try:
+        template = _TEMPLATE_ENV.get_template(src.name)
+    except jinja2.TemplateNotFound:
+        # Fallback (non-fatal)
+        dst.write_text(
+            f"<html><body><h1>{fallback_title} template missing</h1></body></html>",
+            encoding="utf-8",
+        )
+        return
+
+    template.stream(config=config).dump(str(dst), encoding="utf-8")
+
+
 def _write_dashboard_html(config: dict[str, Any]) -> None:
     """Write the dashboard file.
 
@@ -579,61 +816,25 @@ def _write_dashboard_html(config: dict[str, Any]) -> None:
     """
 
     # Always ensure a dashboard exists.
-    if TEMPLATE_PATH.exists():
-        DASHBOARD_PATH.write_text(TEMPLATE_PATH.read_text(encoding="utf-8"), encoding="utf-8")
-        return
-
-    # Fallback (should never happen)
-    DASHBOARD_PATH.write_text(
-        "<html><body><h1>Dashboard template missing</h1></body></html>",
-        encoding="utf-8",
-    )
+    _render_template_html(TEMPLATE_PATH, DASHBOARD_PATH, config, "Dashboard")
 
 
 def _write_analytics_html(config: dict[str, Any]) -> None:
     """Write the analytics page file (served at /analytics)."""
 
-    if ANALYTICS_TEMPLATE_PATH.exists():
-        ANALYTICS_PATH.write_text(
-            ANALYTICS_TEMPLATE_PATH.read_text(encoding="utf-8"),
-            encoding="utf-8",
-        )
-        return
-
-    # Fallback (non-fatal)
-    ANALYTICS_PATH.write_text(
-        "<html><body><h1>Analytics template missing</h1></body></html>",
-        encoding="utf-8",
-    )
+    _render_template_html(ANALYTICS_TEMPLATE_PATH, ANALYTICS_PATH, config, "Analytics")
 
 
 def _write_viz_html(config: dict[str, Any]) -> None:
     """Write the visualizations page file (served at /viz)."""
 
-    if VIZ_TEMPLATE_PATH.exists():
-        VIZ_PATH.write_text(VIZ_TEMPLATE_PATH.read_text(encoding="utf-8"), encoding="utf-8")
-        return
-
-    VIZ_PATH.write_text(
-        "<html><body><h1>Viz template missing</h1></body></html>",
-        encoding="utf-8",
-    )
+    _render_template_html(VIZ_TEMPLATE_PATH, VIZ_PATH, config, "Viz")
 
 
 def _write_deliveries_html(config: dict[str, Any]) -> None:
     """Write the deliveries page file (served at /deliveries)."""
 
-    if DELIVERIES_TEMPLATE_PATH.exists():
-        DELIVERIES_PATH.write_text(
-            DELIVERIES_TEMPLATE_PATH.read_text(encoding="utf-8"),
-            encoding="utf-8",
-        )
-        return
-
-    DELIVERIES_PATH.write_text(
-        "<html><body><h1>Deliveries template missing</h1></body></html>",
-        encoding="utf-8",
-    )
+    _render_template_html(DELIVERIES_TEMPLATE_PATH, DELIVERIES_PATH, config, "Deliveries")
 
 
 def _start_flask_server_subprocess() -> None:
@@ -656,8 +857,11 @@ def run_once(config: dict[str, Any]) -> tuple[list[AtcEvent], list[AtcEvent]]:
     billing_project = config.get("bigquery", {}).get("billing_project")
     project_id = job_project or billing_project
 
-    csv_text = _run_bq_query(config, sql, billing_project=project_id)
-    events = _parse_events_csv(csv_text)
+    if bool(config.get("bigquery", {}).get("use_sdk", False)):
+        events = _run_bq_query_sdk(config, sql, billing_project=project_id)
+    else:
+        json_text = _run_bq_query(config, sql, billing_project=project_id)
+        events = _parse_events_json(json_text)
 
     lookback_minutes = int(config.get("monitoring", {}).get("lookback_minutes", 15))
     query_window_minutes = int(config.get("monitoring", {}).get("query_window_minutes", lookback_minutes))
@@ -671,15 +875,19 @@ def run_once(config: dict[str, Any]) -> tuple[list[AtcEvent], list[AtcEvent]]:
     effective_lookback = max(lookback_minutes, query_window_minutes)
     recent = _filter_recent(events, lookback_minutes=effective_lookback)
 
-    state = load_state()
-    seen: set[str] = set(state.get("seen_event_ids", []))
+    seen = _seen_ids()
 
     new_events = [e for e in recent if e.event_id() not in seen]
 
     # Update state to reflect everything we've seen in the last 24h query.
     # This prevents dupes even if the lookback window changes.
-    updated_seen = list(seen.union({e.event_id() for e in events}))
-    save_state(updated_seen)
+    # Idle cycles (no unseen ids — the common case) skip the rewrite, so the
+    # JSON serialize of a few thousand ids only happens when something landed.
+    all_ids = {e.event_id() for e in events}
+    if not all_ids <= seen:
+        seen |= all_ids
+        # Sorted so the -5000 prune in save_state is deterministic.
+        save_state(sorted(seen))
 
     return events, new_events
 
@@ -689,15 +897,15 @@ def _write_status(config: dict[str, Any], **updates: Any) -> None:
     payload: dict[str, Any] = {}
     if STATUS_PATH.exists():
         try:
-            payload = json.loads(STATUS_PATH.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
+            payload = atc_json.loads(STATUS_PATH.read_bytes())
+        except (OSError, json.JSONDecodeError):
             payload = {}
 
     payload.setdefault("facility_id", config.get("monitoring", {}).get("facility_id"))
     payload.setdefault("tableau_url", str(config.get("dashboard", {}).get("tableau_url", "")).strip())
     payload.update(updates)
 
-    STATUS_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    _write_json_atomic(STATUS_PATH, payload)
 
 
 def main() -> None:
@@ -800,8 +1008,7 @@ def main() -> None:
             if new_events:
                 print(f"[ALERT] {len(new_events)} new event(s)", flush=True)
                 if notifications_enabled:
-                    for e in new_events:
-                        _send_notification(config, e)
+                    _send_aggregated_notification(config, new_events)
                 else:
                     print("[INFO] Notifications disabled (config.notifications.enabled=false)", flush=True)
             else:
@@ -1,41 +1,42 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime
-from pathlib import Path
+import time
 
+import atc_cfg
 from graph_email_sender import GraphConfig, send_mail
 
 
-BASE_DIR = Path(__file__).resolve().parent
-CFG_PATH = BASE_DIR / "atc_config.json"
-
-
 def main() -> None:
-    cfg = json.loads(CFG_PATH.read_text(encoding="utf-8"))
+    cfg = atc_cfg.load()
     email_cfg = cfg.get("email_notifications", {})
     graph = email_cfg.get("graph", {})
 
+    _s = str  # local bind: one global lookup instead of one per field/recipient
     gc = GraphConfig(
-        tenant=str(graph.get("tenant", "common")),
-        client_id=str(graph.get("client_id", "")),
-        sender=str(graph.get("sender", "")),
-        token_cache_file=str(graph.get("token_cache_file", "msal_token_cache.bin")),
+        tenant=_s(graph.get("tenant", "common")),
+        client_id=_s(graph.get("client_id", "")),
+        sender=_s(graph.get("sender", "")),
+        token_cache_file=_s(graph.get("token_cache_file", "msal_token_cache.bin")),
     )
 
-    to = email_cfg.get("recipients", []) or [gc.sender]
-    to = [str(x) for x in to if str(x).strip()]
+    # Single pass, one str() per recipient; keeps the stripped copies and
+    # drops empties.
+    to = [v for v in (_s(x).strip() for x in (email_cfg.get("recipients") or [gc.sender])) if v]
 
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Straight to C strftime; no datetime object or tz plumbing needed here.
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
     subject = f"[ATC] Graph email test ({now})"
-    html = (
-        f"<h2>Manual Receiving ATC - Graph Test</h2>"
-        f"<p>This is a test email sent via Microsoft Graph.</p>"
-        f"<ul>"
-        f"<li>Sender: {gc.sender}</li>"
-        f"<li>Recipients: {', '.join(to)}</li>"
-        f"<li>Time: {now}</li>"
-        f"</ul>"
+    # One join over constant + formatted fragments; no intermediate strings.
+    html = "".join(
+        (
+            "<h2>Manual Receiving ATC - Graph Test</h2>",
+            "<p>This is a test email sent via Microsoft Graph.</p>",
+            "<ul>",
+            f"<li>Sender: {gc.sender}</li>",
+            f"<li>Recipients: {', '.join(to)}</li>",
+            f"<li>Time: {now}</li>",
+            "</ul>",
+        )
     )
 
     print("Sending test email via Microsoft Graph...", flush=True)
@@ -1,19 +1,14 @@
 from __future__ import annotations
 
-import json
 import sys
-from datetime import datetime
-from pathlib import Path
+import time
 
+import atc_cfg
 from atc_teams_webhook import TeamsWebhookConfig, post_teams_message
 
 
-BASE_DIR = Path(__file__).resolve().parent
-CFG_PATH = BASE_DIR / "atc_config.json"
-
-
 def main() -> None:
-    cfg = json.loads(CFG_PATH.read_text(encoding="utf-8"))
+    cfg = atc_cfg.load()
     teams = cfg.get("teams_notifications", {})
     hooks = teams.get("webhooks_by_shift", {}) or {}
 
@@ -22,7 +17,7 @@ def main() -> None:
     if not url:
         raise SystemExit(f"No webhook configured for shift: {shift}")
 
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
     title = f"[ATC] Test message ({shift})"
     lines = [
         f"This is a test Teams message from Manual Receiving ATC.",
@@ -31,15 +31,28 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import random
+import signal
+import sys
+import threading
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
-import requests
+import atc_json
 
+if TYPE_CHECKING:
+    import requests
+
+
+# (connect, read) for the token poll: AAD answers pending polls in <1 s, so a
+# stuck socket should surface fast instead of blocking a whole 15 s quantum.
+_POLL_TIMEOUT = (3.05, 5)
 
 GRAPH_ENDPOINT = "https://graph.microsoft.com/v1.0"
+_ME_CHATS_URL = f"{GRAPH_ENDPOINT}/me/chats"
 GRAPH_SCOPES = [
     "https://graph.microsoft.com/User.Read",
     "https://graph.microsoft.com/Chat.ReadWrite",
@@ -53,22 +66,59 @@ class GraphAuthConfig:
     token_cache_file: str
 
 
+# Keep-alive session: every call below hits login.microsoftonline.com or
+# graph.microsoft.com, and _device_code_finish polls in a loop — one pooled
+# session amortizes the TLS handshake instead of paying it per request.
+# Built lazily so --help and arg-error exits don't pay the requests import.
+_session_instance: requests.Session | None = None
+
+
+def _session() -> requests.Session:
+    global _session_instance
+    if _session_instance is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        s = requests.Session()
+        s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        _session_instance = s
+    return _session_instance
+
+
+def _check(resp: requests.Response, *, ok: tuple[int, ...] = (200,)) -> None:
+    # One status gate for every Graph/AAD call; resp.text (a full body
+    # decode) is only materialized on the failure path.
+    if resp.status_code not in ok:
+        raise RuntimeError(
+            f"{resp.request.method} {resp.url} -> {resp.status_code} {resp.text[:500]}"
+        )
+
+
 def _now_epoch() -> int:
     return int(time.time())
 
 
 def _load_token_cache(path: Path) -> dict[str, Any] | None:
-    if not path.exists():
-        return None
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
+        # Memoized on mtime: --finish-auth reads this twice per run, the
+        # second read is a stat. Bytes in/out, no UTF-8 decode pass; a
+        # missing file is just the OSError branch, no exists() pre-check.
+        payload = atc_json.load_file_cached(path)
+    except (OSError, json.JSONDecodeError):
         return None
     return payload if isinstance(payload, dict) else None
 
 
 def _save_token_cache(path: Path, payload: dict[str, Any]) -> None:
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    # os-level write (tokens: keep the file owner-only on POSIX). The cache
+    # is machine-read, so write compact bytes — roughly half the size of the
+    # old indent=2 output; set ATC_DEBUG_JSON=1 to pretty-print for eyeballs.
+    pretty = bool(os.getenv("ATC_DEBUG_JSON"))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, atc_json.dumps_bytes(payload, indent=pretty))
+    finally:
+        os.close(fd)
 
 
 def _cached_access_token(cache_path: Path) -> str | None:
@@ -90,15 +140,16 @@ def _device_code_start(*, tenant: str, client_id: str, scopes: list[str]) -> dic
     device_code_url = f"https://login.microsoftonline.com/{tenant}/oauth2/v2.0/devicecode"
 
     print("Requesting device code...", flush=True)
-    dc_resp = requests.post(
+    dc_resp = _session().post(
         device_code_url,
         data={"client_id": client_id, "scope": scope_str},
         timeout=15,
     )
-    if dc_resp.status_code != 200:
-        raise RuntimeError(f"devicecode failed: {dc_resp.status_code} {dc_resp.text}")
+    _check(dc_resp)
 
-    dc = dc_resp.json()
+    # Bytes straight into the C parser; Response.json adds an encoding sniff
+    # and stdlib dispatch on top of the same content.
+    dc = atc_json.loads(dc_resp.content)
     if not isinstance(dc, dict):
         raise RuntimeError(f"devicecode response not json object: {dc}")
 
@@ -123,56 +174,93 @@ def _device_code_start(*, tenant: str, client_id: str, scopes: list[str]) -> dic
 def _device_code_finish(*, tenant: str, client_id: str, device_code: str, interval_s: int, expires_in_s: int) -> str:
     """Poll token endpoint until authorized (or timeout)."""
 
+    import requests
+
     token_url = f"https://login.microsoftonline.com/{tenant}/oauth2/v2.0/token"
-    deadline = _now_epoch() + int(expires_in_s)
-    interval = max(1, int(interval_s))
+    # monotonic: the polling window shouldn't stretch or shrink if the wall
+    # clock jumps (NTP sync, DST) mid-flow.
+    deadline = time.monotonic() + int(expires_in_s)
+    interval = float(max(1, int(interval_s)))
+
+    # Event-based waiter: on Windows, Ctrl-C doesn't break time.sleep until
+    # the quantum ends. SIGINT sets the event, so the wait wakes immediately,
+    # and the wait is clamped to the deadline — never a full quantum past it.
+    stop = threading.Event()
+    prev_handler = signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    def _wait(seconds: float) -> None:
+        if stop.wait(min(seconds, max(0.0, deadline - time.monotonic()))):
+            raise KeyboardInterrupt
 
     print("Polling token endpoint...", flush=True)
     last_status: str | None = None
 
-    while _now_epoch() < deadline:
-        time.sleep(interval)
-        tok_resp = requests.post(
-            token_url,
-            data={
-                "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
-                "client_id": client_id,
-                "device_code": device_code,
-            },
-            timeout=15,
-        )
-
-        if tok_resp.status_code == 200:
-            tok = tok_resp.json()
-            access_token = str(tok.get("access_token") or "")
-            if not access_token:
-                raise RuntimeError(f"token response missing access_token: {tok}")
-            return access_token
-
-        if tok_resp.status_code == 400:
-            is_json = tok_resp.headers.get("content-type", "").startswith("application/json")
-            err = tok_resp.json() if is_json else {}
-            code = str(err.get("error") or "")
-            desc = str(err.get("error_description") or "")
-
-            # Print status changes so it doesn't look "stuck".
-            status_line = code or f"http_400"
-            if status_line != last_status:
-                print(f"Token status: {status_line}", flush=True)
-                if desc:
-                    print(desc.splitlines()[0][:200], flush=True)
-                last_status = status_line
-
-            if code in ("authorization_pending", "slow_down"):
-                if code == "slow_down":
-                    interval = min(60, interval + 2)
+    # Poll first, sleep after: users who approve quickly get their token
+    # immediately instead of burning one interval up front.
+    try:
+        while time.monotonic() < deadline:
+            try:
+                tok_resp = _session().post(
+                    token_url,
+                    data={
+                        "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+                        "client_id": client_id,
+                        "device_code": device_code,
+                    },
+                    timeout=_POLL_TIMEOUT,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # Transient network blip: retry on the normal cadence, don't fail.
+                status_line = type(e).__name__
+                if status_line != last_status:
+                    print(f"Token status: {status_line} (retrying)", flush=True)
+                    last_status = status_line
+                _wait(interval + random.uniform(0, 0.25))
                 continue
 
-            raise RuntimeError(f"token failed: {tok_resp.status_code} {tok_resp.text}")
+            if tok_resp.status_code == 200:
+                tok = atc_json.loads(tok_resp.content)
+                access_token = str(tok.get("access_token") or "")
+                if not access_token:
+                    raise RuntimeError(f"token response missing access_token: {tok}")
+                return access_token
+
+            if tok_resp.status_code == 400:
+                # Just try the parse: the error body is ~50 bytes, cheaper than
+                # walking the CaseInsensitiveDict for content-type every poll.
+                try:
+                    err = atc_json.loads(tok_resp.content) if tok_resp.content else {}
+                except json.JSONDecodeError:
+                    err = {}
+                if not isinstance(err, dict):
+                    err = {}
+                code = str(err.get("error") or "")
+                desc = str(err.get("error_description") or "")
+
+                # Print status changes so it doesn't look "stuck".
+                status_line = code or f"http_400"
+                if status_line != last_status:
+                    print(f"Token status: {status_line}", flush=True)
+                    if desc:
+                        print(desc.splitlines()[0][:200], flush=True)
+                    last_status = status_line
+
+                if code in ("authorization_pending", "slow_down"):
+                    if code == "slow_down":
+                        # RFC 8628: back off multiplicatively when AAD asks.
+                        interval = min(60.0, interval * 2)
+                    # Small jitter keeps retries off the server's rate-window edge.
+                    _wait(interval + random.uniform(0, 0.25))
+                    continue
+
+                raise RuntimeError(f"token failed: {tok_resp.status_code} {tok_resp.text}")
 
-        raise RuntimeError(f"token failed: {tok_resp.status_code} {tok_resp.text}")
+            raise RuntimeError(f"token failed: {tok_resp.status_code} {tok_resp.text}")
 
-    raise RuntimeError("Device code expired before authorization completed")
+        raise RuntimeError("Device code expired before authorization completed")
+    finally:
+        # Hand SIGINT back to its previous owner before returning/raising.
+        signal.signal(signal.SIGINT, prev_handler)
 
 
 def _get_cfg(args: argparse.Namespace) -> GraphAuthConfig:
@@ -203,45 +291,78 @@ def _require_cached_token(cfg: GraphAuthConfig) -> str:
     )
 
 
-def list_chats(*, token: str, top: int) -> list[dict[str, Any]]:
-    url = f"{GRAPH_ENDPOINT}/me/chats?$top={int(top)}"
-    resp = requests.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=30)
-    if resp.status_code != 200:
-        raise RuntimeError(f"Graph list chats failed: {resp.status_code} {resp.text}")
+def iter_chats(*, token: str, top: int) -> Iterator[dict[str, Any]]:
+    # Generator so the caller prints rows as it walks them instead of
+    # holding a second materialized list next to the parsed payload.
+    url = f"{_ME_CHATS_URL}?$top={int(top)}"
+    resp = _session().get(url, headers={"Authorization": f"Bearer {token}"}, timeout=30)
+    _check(resp)
+
+    payload = atc_json.loads(resp.content)
+    value = payload.get("value", []) if isinstance(payload, dict) else []
+    yield from (c for c in value if type(c) is dict)
 
-    payload = resp.json()
-    return payload.get("value", []) if isinstance(payload, dict) else []
+
+@lru_cache(maxsize=1)
+def _auth_headers(token: str) -> dict[str, str]:
+    # One token per run: cache the header dict so a batch of sends doesn't
+    # re-allocate it per call.
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
 
 def send_chat_message(*, token: str, chat_id: str, message: str) -> None:
-    if not chat_id.strip():
+    # Allocation-free emptiness check (strip() builds a new string).
+    if not chat_id or chat_id.isspace():
         raise ValueError("chat_id is required")
 
     url = f"{GRAPH_ENDPOINT}/chats/{chat_id}/messages"
-    payload = {"body": {"contentType": "html", "content": message}}
+    body = atc_json.dumps_bytes({"body": {"contentType": "html", "content": message}})
 
-    resp = requests.post(
+    resp = _session().post(
         url,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps(payload),
+        headers=_auth_headers(token),
+        data=body,
         timeout=30,
     )
 
-    if resp.status_code not in (201, 200):
-        raise RuntimeError(f"Graph send chat message failed: {resp.status_code} {resp.text}")
-
-
-def main() -> int:
+    _check(resp, ok=(200, 201))
+
+
+# Defaults shared by the argparse parser and the fast path below; keep the
+# two in sync when adding options.
+_ARG_DEFAULTS = {
+    "tenant": None,
+    "client_id": None,
+    "token_cache_file": None,
+    "device_code_file": "graph_device_code_teams_chat.json",
+    "start_auth": False,
+    "finish_auth": False,
+    "list": False,
+    "top": 25,
+    "send": False,
+    "chat_id": "",
+    "message": "hello from ATC via Graph",
+}
+
+_FAST_FLAGS = {"--start-auth", "--finish-auth", "--list"}
+
+
+def _parse_args() -> argparse.Namespace:
+    # Fast path: the common single-flag invocations don't need the parser at
+    # all, and building one costs ~10 ms of startup when scripted.
+    if len(sys.argv) == 2 and sys.argv[1] in _FAST_FLAGS:
+        args = argparse.Namespace(**_ARG_DEFAULTS)
+        setattr(args, sys.argv[1][2:].replace("-", "_"), True)
+        return args
+
+    d = _ARG_DEFAULTS
     p = argparse.ArgumentParser()
     p.add_argument("--tenant", help="Entra tenant id (or env GRAPH_TENANT)")
     p.add_argument("--client-id", help="Entra app client id (or env GRAPH_CLIENT_ID)")
     p.add_argument("--token-cache-file", help="Token cache file (or env GRAPH_TOKEN_CACHE)")
     p.add_argument(
         "--device-code-file",
-        default="graph_device_code_teams_chat.json",
+        default=d["device_code_file"],
         help="Where to store the device-code payload between steps",
     )
 
@@ -249,15 +370,20 @@ def main() -> int:
     p.add_argument("--finish-auth", action="store_true", help="Finish device-code auth (poll token) and cache token")
 
     p.add_argument("--list", action="store_true", help="List recent chats (requires cached token)")
-    p.add_argument("--top", type=int, default=25, help="How many chats to list")
+    p.add_argument("--top", type=int, default=d["top"], help="How many chats to list")
 
     p.add_argument("--send", action="store_true", help="Send a message (requires cached token)")
-    p.add_argument("--chat-id", default="", help="Chat ID to send to")
-    p.add_argument("--message", default="hello from ATC via Graph", help="Message content (HTML allowed)")
+    p.add_argument("--chat-id", default=d["chat_id"], help="Chat ID to send to")
+    p.add_argument("--message", default=d["message"], help="Message content (HTML allowed)")
 
     args = p.parse_args()
     if not (args.start_auth or args.finish_auth or args.list or args.send):
         p.error("Choose one of: --start-auth, --finish-auth, --list, --send")
+    return args
+
+
+def main() -> int:
+    args = _parse_args()
 
     cfg = _get_cfg(args)
     device_path = Path(str(args.device_code_file))
@@ -270,6 +396,8 @@ def main() -> int:
         return 0
 
     if args.finish_auth:
+        # Read once through the mtime-memoized orjson loader; no second
+        # parse of the device-code payload happens this run.
         dc = _load_token_cache(device_path)
         if not dc:
             raise RuntimeError(f"No device-code payload found at {device_path}. Run --start-auth first.")
@@ -293,14 +421,15 @@ def main() -> int:
     token = _require_cached_token(cfg)
 
     if args.list:
-        chats = list_chats(token=token, top=args.top)
-        if not chats:
-            print("No chats returned.")
-        for c in chats:
+        count = 0
+        for c in iter_chats(token=token, top=args.top):
+            count += 1
             chat_id = str(c.get("id", ""))
             chat_type = str(c.get("chatType", ""))
             topic = str(c.get("topic", ""))
             print(f"{chat_id}\t{chat_type}\t{topic}")
+        if not count:
+            print("No chats returned.")
 
     if args.send:
         send_chat_message(token=token, chat_id=args.chat_id, message=args.message)